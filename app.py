@@ -1,5 +1,8 @@
 """Voice Agent FastAPI application."""
 
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 import uvicorn
 
 from fastapi import FastAPI
@@ -8,6 +11,7 @@ from config import Config
 from state import CallStateManager
 from exceptions import ConfigurationError
 from core.logging import configure_logging, get_logger
+from core.clients import create_openai_client, create_elevenlabs_client
 from routers.voice import router as voice_router, get_config
 from routers.media import router as media_router
 
@@ -22,10 +26,23 @@ except ValueError as e:
     logger.error("Configuration error", error=str(e))
     raise ConfigurationError(f"Failed to load configuration: {e}") from e
 
+# Shared API clients: one connection pool per process, reused by every call
+openai_client = create_openai_client(config.openai_api_key)
+tts_client = create_elevenlabs_client(config.elevenlabs_api_key)
+
 # Initialize call state manager
-call_state_manager = CallStateManager(config)
+call_state_manager = CallStateManager(config, openai_client, tts_client)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Close shared clients on shutdown."""
+    yield
+    await openai_client.close()
+    await tts_client.aclose()
+
 
-app = FastAPI(title="Voice Agent", version="1.0.0")
+app = FastAPI(title="Voice Agent", version="1.0.0", lifespan=lifespan)
 
 # Dependency override: inject config for routes
 app.dependency_overrides[get_config] = lambda: config
@@ -49,6 +66,12 @@ if __name__ == "__main__":
         "app:app",
         host=config.host,
         port=config.port,
-        reload=True,
+        # uvicorn[standard] provides uvloop and httptools; "auto" uses them where
+        # available and falls back to asyncio / h11 (e.g. uvloop on Windows)
+        loop="auto",
+        http="auto",
+        ws="websockets",
+        ws_per_message_deflate=False,
+        reload=config.reload,
         log_level="info",
     )
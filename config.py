@@ -1,7 +1,27 @@
 """Configuration management for the voice agent application."""
 import os
+import re
+import textwrap
 from typing import Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+
+# Strip optional scheme and path so we always build wss://host/media ourselves
+_HOST_STRIP = re.compile(r"^(?://|https?://|wss?://)?([^/]+).*$")
+
+
+def normalize_media_stream_url(public_host: str, path: str = "/media") -> str:
+    """Build a wss:// URL for Twilio Media Streams from PUBLIC_HOST.
+    Tolerates PUBLIC_HOST with or without scheme (e.g. https://example.com or example.com).
+    """
+    if not public_host or not public_host.strip():
+        return f"wss://localhost:8000{path}"
+    host = public_host.strip()
+    match = _HOST_STRIP.match(host)
+    if match:
+        host = match.group(1).rstrip("/")
+    if not host:
+        return f"wss://localhost:8000{path}"
+    return f"wss://{host}{path}"
 
 
 @dataclass
@@ -20,12 +40,25 @@ class Config:
     port: int = 8000
     silence_threshold_ms: int = 1500
     stt_sample_rate: int = 8000
+    stt_batch_ms: int = 200
+    stt_backend: str = "whisper"  # "whisper" (local VAD + upload) or "realtime"
+    stt_realtime_model: str = "gpt-4o-mini-transcribe"
     elevenlabs_voice_id: str = "21m00Tcm4TlvDq8ikWAM"  # Default: Rachel voice
-    tts_chunk_size: int = 320  # 20ms of 8kHz audio
-    llm_model: str = "gpt-3.5-turbo"
+    tts_chunk_size: int = 160  # one Twilio frame: 20 ms of 8 kHz mu-law (1 byte/sample)
+    tts_frames_per_message: int = 5  # frames per outbound media message (5 x 20 ms = 100 ms)
+    tts_output_format: str = "ulaw_8000"  # "ulaw_8000" (native), "pcm_8000" or "mp3" (decoded locally)
+    llm_model: str = "gpt-4o-mini"
     llm_max_tokens: int = 150
     llm_temperature: float = 0.7
     silence_threshold_db: float = -40.0
+    max_active_calls: int = 10_000
+    call_state_ttl_s: int = 3600
+    reload: bool = False
+    # Derived from public_host once, in __post_init__
+    media_stream_url: str = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.media_stream_url = normalize_media_stream_url(self.public_host)
     
     @classmethod
     def from_env(cls) -> "Config":
@@ -42,12 +75,23 @@ class Config:
         if not elevenlabs_api_key:
             raise ValueError("ELEVENLABS_API_KEY environment variable is required")
         
+        stt_backend = os.getenv("STT_BACKEND", "whisper").strip().lower()
+        if stt_backend not in ("whisper", "realtime"):
+            raise ValueError("STT_BACKEND must be 'whisper' or 'realtime'")
+
+        tts_output_format = os.getenv("TTS_OUTPUT_FORMAT", "ulaw_8000").strip().lower()
+        if tts_output_format not in ("ulaw_8000", "pcm_8000", "mp3"):
+            raise ValueError("TTS_OUTPUT_FORMAT must be 'ulaw_8000', 'pcm_8000' or 'mp3'")
+
         def _int(key: str, default: str) -> int:
             return int(os.getenv(key, default))
 
         def _float(key: str, default: str) -> float:
             return float(os.getenv(key, default))
 
+        def _bool(key: str, default: str) -> bool:
+            return os.getenv(key, default).strip().lower() in ("1", "true", "yes")
+
         return cls(
             twilio_auth_token=twilio_auth_token,
             twilio_account_sid=os.getenv("TWILIO_ACCOUNT_SID"),
@@ -58,17 +102,26 @@ class Config:
             port=_int("PORT", "8000"),
             silence_threshold_ms=_int("SILENCE_THRESHOLD_MS", "1500"),
             stt_sample_rate=_int("STT_SAMPLE_RATE", "8000"),
+            stt_batch_ms=_int("STT_BATCH_MS", "200"),
+            stt_backend=stt_backend,
+            stt_realtime_model=os.getenv("STT_REALTIME_MODEL", "gpt-4o-mini-transcribe"),
             elevenlabs_voice_id=os.getenv("ELEVENLABS_VOICE_ID", "21m00Tcm4TlvDq8ikWAM"),
-            tts_chunk_size=_int("TTS_CHUNK_SIZE", "320"),
-            llm_model=os.getenv("LLM_MODEL", "gpt-3.5-turbo"),
+            tts_chunk_size=_int("TTS_CHUNK_SIZE", "160"),
+            tts_frames_per_message=_int("TTS_FRAMES_PER_MESSAGE", "5"),
+            tts_output_format=tts_output_format,
+            llm_model=os.getenv("LLM_MODEL", "gpt-4o-mini"),
             llm_max_tokens=_int("LLM_MAX_TOKENS", "150"),
             llm_temperature=_float("LLM_TEMPERATURE", "0.7"),
             silence_threshold_db=_float("SILENCE_THRESHOLD_DB", "-40.0"),
+            max_active_calls=_int("MAX_ACTIVE_CALLS", "10000"),
+            call_state_ttl_s=_int("CALL_STATE_TTL_S", "3600"),
+            reload=_bool("RELOAD", "false"),
         )
 
 
-# Collections agent system prompt
-COLLECTIONS_AGENT_PROMPT = """You are a professional collections agent for a financial services company. Your role is to help customers resolve outstanding payments in a respectful, empathetic, and compliant manner.
+# Collections agent system prompt, normalized once at import and sent verbatim every turn
+COLLECTIONS_AGENT_PROMPT = textwrap.dedent("""\
+You are a professional collections agent for a financial services company. Your role is to help customers resolve outstanding payments in a respectful, empathetic, and compliant manner.
 
 Key guidelines:
 - Always be polite and professional
@@ -86,4 +139,5 @@ You must comply with FDCPA and state collection laws:
 - No threats of violence or arrest
 - No communication with third parties about debt
 
-Respond naturally as if speaking on a phone call."""
+Respond naturally as if speaking on a phone call.
+""").strip()
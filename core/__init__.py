@@ -2,5 +2,12 @@
 
 from core.logging import configure_logging, get_logger
 from core.constants import TwilioEvent
+from core.clients import create_openai_client, create_elevenlabs_client
 
-__all__ = ["configure_logging", "get_logger", "TwilioEvent"]
+__all__ = [
+    "configure_logging",
+    "get_logger",
+    "TwilioEvent",
+    "create_openai_client",
+    "create_elevenlabs_client",
+]
@@ -0,0 +1,29 @@
+"""Shared HTTP/API clients, created once per process and reused across calls."""
+
+import httpx
+import openai
+
+
+def create_openai_client(api_key: str) -> openai.AsyncOpenAI:
+    """Return an AsyncOpenAI client backed by a pooled keep-alive HTTP/2 connection."""
+    http_client = httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(
+            max_keepalive_connections=16,
+            max_connections=32,
+            keepalive_expiry=60,
+        ),
+        timeout=httpx.Timeout(60, connect=10),
+    )
+    return openai.AsyncOpenAI(api_key=api_key, http_client=http_client)
+
+
+def create_elevenlabs_client(api_key: str) -> httpx.AsyncClient:
+    """Return a pooled keep-alive HTTP/2 client for the ElevenLabs API (auth and base URL preset)."""
+    return httpx.AsyncClient(
+        base_url="https://api.elevenlabs.io/v1",
+        headers={"xi-api-key": api_key},
+        http2=True,
+        limits=httpx.Limits(max_keepalive_connections=32),
+        timeout=httpx.Timeout(30, connect=5),
+    )
@@ -20,3 +20,12 @@ MARK_KEY = "mark"
 MARK_NAME_KEY = "name"
 ACCOUNT_SID_KEY = "accountSid"
 SEQUENCE_NUMBER_KEY = "sequenceNumber"
+
+# Outbound message templates. Twilio only accepts text frames, so these are str.
+# The streamSid (and mark name) placeholders take JSON-encoded strings, e.g.
+# orjson.dumps(stream_sid).decode(); the media payload is base64 and needs no escaping.
+CLEAR_MESSAGE_TEMPLATE = '{"event":"clear","streamSid":%s}'
+# Media messages are prefix + payload + suffix; the prefix is built once per stream
+MEDIA_MESSAGE_PREFIX_TEMPLATE = '{"event":"media","streamSid":%s,"media":{"payload":"'
+MEDIA_MESSAGE_SUFFIX = '"}}'
+MARK_MESSAGE_TEMPLATE = '{"event":"mark","streamSid":%s,"mark":{"name":%s}}'
@@ -1,8 +1,16 @@
 """Structured logging configuration."""
 
+from typing import Any
+
+import orjson
 import structlog
 
 
+def _orjson_dumps(obj: Any, **kwargs: Any) -> str:
+    """structlog JSON serializer backed by orjson (stdlib handlers expect str)."""
+    return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS, **kwargs).decode()
+
+
 def configure_logging() -> None:
     """Configure structlog for the application."""
     structlog.configure(
@@ -15,7 +23,7 @@ def configure_logging() -> None:
             structlog.processors.StackInfoRenderer(),
             structlog.processors.format_exc_info,
             structlog.processors.UnicodeDecoder(),
-            structlog.processors.JSONRenderer(),
+            structlog.processors.JSONRenderer(serializer=_orjson_dumps),
         ],
         context_class=dict,
         logger_factory=structlog.stdlib.LoggerFactory(),
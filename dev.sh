@@ -13,7 +13,7 @@ fi
 
 # Start backend in background
 echo "🚀 Starting FastAPI backend on http://localhost:8000"
-python app.py &
+RELOAD=true python app.py &
 BACKEND_PID=$!
 
 # Wait a moment for backend to start
@@ -8,6 +8,7 @@ __all__ = [
     "LLMError",
     "TTSError",
     "AudioProcessingError",
+    "CallCapacityError",
 ]
 
 
@@ -44,3 +45,8 @@ class TTSError(VoiceAgentException):
 class AudioProcessingError(VoiceAgentException):
     """Raised when audio processing fails."""
     pass
+
+
+class CallCapacityError(VoiceAgentException):
+    """Raised when a new call would exceed the active call limit."""
+    pass
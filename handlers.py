@@ -1,34 +1,47 @@
 """WebSocket message handlers for Twilio Media Streams."""
-import json
-import base64
 import asyncio
-from typing import Any
+import logging
+from contextlib import aclosing
+from typing import Any, AsyncGenerator
 
+import orjson
+import pybase64
 from fastapi import WebSocket
 
 from core.constants import (
-    EVENT_KEY,
-    STREAM_SID_KEY,
+    CLEAR_MESSAGE_TEMPLATE,
     MEDIA_KEY,
     PAYLOAD_KEY,
     MARK_KEY,
     MARK_NAME_KEY,
     ACCOUNT_SID_KEY,
     SEQUENCE_NUMBER_KEY,
-    TwilioEvent,
 )
 from core.logging import get_logger
 from state import CallState
+from tts import FLUSH_AUDIO
 from exceptions import AudioProcessingError, STTError, LLMError, TTSError
 
 logger = get_logger()
 
+# Max reply sentences synthesized concurrently (playback stays in order)
+TTS_MAX_CONCURRENCY = 3
+
 # Fallback message when LLM fails
 LLM_FALLBACK_MESSAGE = (
     "I'm sorry, I'm having trouble processing your request. Can you please try again?"
 )
 
 
+def _log_cancelled_task(task: asyncio.Task) -> None:
+    """Done-callback for a cancelled reply task: ignore cancellation, log anything else."""
+    if task.cancelled():
+        return
+    error = task.exception()
+    if error is not None:
+        logger.error("Cancelled TTS task failed", error=str(error))
+
+
 async def handle_start(websocket: WebSocket, data: dict[str, Any], call_state: CallState) -> None:
     """Handle stream start event."""
     logger.info(
@@ -40,75 +53,63 @@ async def handle_start(websocket: WebSocket, data: dict[str, Any], call_state: C
 
 async def handle_media(websocket: WebSocket, data: dict[str, Any], call_state: CallState) -> None:
     """Handle inbound media."""
-    logger.debug(
-        "Received media",
-        stream_sid=call_state.stream_sid,
-        sequence_number=data.get(SEQUENCE_NUMBER_KEY),
-    )
+    # Runs 50x/sec per call: skip building the log kwargs unless DEBUG is on
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "Received media",
+            stream_sid=call_state.stream_sid,
+            sequence_number=data.get(SEQUENCE_NUMBER_KEY),
+        )
 
     # Check for barge-in: if user is speaking while TTS is playing, stop TTS
     if call_state.current_tts_task and not call_state.current_tts_task.done():
-        clear_message = {
-            EVENT_KEY: TwilioEvent.CLEAR,
-            STREAM_SID_KEY: call_state.stream_sid,
-        }
-        await websocket.send_text(json.dumps(clear_message))
-
-        # Cancel current TTS task
+        # Cancel current TTS task without waiting on it (this frame's 20 ms budget);
+        # cancelling the reply also cancels its queued LLM/TTS chunks. Cancel before
+        # sending clear so no further media can be queued behind the clear.
         call_state.current_tts_task.cancel()
-        try:
-            await call_state.current_tts_task
-        except asyncio.CancelledError:
-            pass
+        call_state.current_tts_task.add_done_callback(_log_cancelled_task)
+        call_state.current_tts_task = None
+
+        await websocket.send_text(
+            CLEAR_MESSAGE_TEMPLATE % orjson.dumps(call_state.stream_sid).decode()
+        )
 
         logger.info("Barge-in detected, stopped current TTS",
                    stream_sid=call_state.stream_sid)
 
     # Decode base64 audio
     try:
-        media = data.get(MEDIA_KEY) or {}
-        audio_payload = media.get(PAYLOAD_KEY)
+        media = data.get(MEDIA_KEY)
+        audio_payload = media.get(PAYLOAD_KEY) if media else None
         if not audio_payload:
             return
 
-        audio_data = base64.b64decode(audio_payload)
+        # SIMD-accelerated decode; Twilio payloads are well-formed so skip validation
+        audio_data = pybase64.b64decode(audio_payload, validate=False)
+
+        # Coalesce 20 ms frames and hand STT one batch (STT_BATCH_MS) at a time
+        batch = call_state.audio_ring
+        batch += audio_data
+        if len(batch) < call_state.stt_processor.batch_bytes:
+            return
+        call_state.audio_ring = bytearray()
 
         # Process audio through STT
         transcription = await call_state.stt_processor.process_audio_chunk(
-            audio_data, call_state.stream_sid
+            batch, call_state.stream_sid
         )
 
-        # If utterance is complete, generate response
+        # If utterance is complete, stream the reply (LLM -> TTS) in background
         if transcription:
             logger.info("Utterance complete",
                        stream_sid=call_state.stream_sid,
                        transcription=transcription)
 
-            # Generate LLM response
-            try:
-                llm_response = await call_state.llm_agent.generate_response(
-                    transcription, call_state.stream_sid
-                )
-
-                if llm_response:
-                    # Start TTS streaming in background
-                    call_state.mark_id += 1
-                    mark_id = f"mark_{call_state.mark_id}"
-
-                    call_state.current_tts_task = asyncio.create_task(
-                        stream_tts_response(websocket, call_state, llm_response, mark_id)
-                    )
-            except LLMError as e:
-                logger.error(
-                    "LLM response generation failed",
-                    stream_sid=call_state.stream_sid,
-                    error=str(e),
-                )
-                call_state.mark_id += 1
-                mark_id = f"mark_{call_state.mark_id}"
-                call_state.current_tts_task = asyncio.create_task(
-                    stream_tts_response(websocket, call_state, LLM_FALLBACK_MESSAGE, mark_id)
-                )
+            call_state.mark_id += 1
+            mark_id = f"mark_{call_state.mark_id}"
+            call_state.current_tts_task = asyncio.create_task(
+                stream_reply(websocket, call_state, transcription, mark_id)
+            )
 
     except (AudioProcessingError, STTError) as e:
         logger.error("Media processing failed",
@@ -127,8 +128,8 @@ async def handle_stop(websocket: WebSocket, data: dict[str, Any], call_state: Ca
 
 async def handle_mark(websocket: WebSocket, data: dict[str, Any], call_state: CallState) -> None:
     """Handle mark event (TTS playback completed)."""
-    mark_obj = data.get(MARK_KEY) or {}
-    mark_name = mark_obj.get(MARK_NAME_KEY) or data.get(MARK_NAME_KEY)
+    mark_obj = data.get(MARK_KEY)
+    mark_name = (mark_obj.get(MARK_NAME_KEY) if mark_obj else None) or data.get(MARK_NAME_KEY)
     if mark_name and mark_name in call_state.pending_marks:
         call_state.pending_marks.discard(mark_name)
 
@@ -139,26 +140,123 @@ async def handle_mark(websocket: WebSocket, data: dict[str, Any], call_state: Ca
     )
 
 
-async def stream_tts_response(
-    websocket: WebSocket,
+async def _synthesize(
     call_state: CallState,
     text: str,
+    chunk_id: int,
+    out: asyncio.Queue,
+    semaphore: asyncio.Semaphore,
+    failures: list[Exception],
+) -> None:
+    """Synthesize one reply chunk into ``out``; a trailing ``None`` marks its end.
+
+    Failures are recorded in ``failures`` and reported once per reply by _reply_audio.
+    """
+    try:
+        async with semaphore:
+            async for audio in call_state.tts_engine.generate_speech_stream(
+                text, call_state.stream_sid
+            ):
+                out.put_nowait(audio)
+    except Exception as e:
+        failures.append(e)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("TTS chunk failed",
+                        stream_sid=call_state.stream_sid,
+                        chunk_id=chunk_id,
+                        error=str(e))
+    finally:
+        out.put_nowait(None)
+
+
+async def _dispatch_reply(
+    call_state: CallState,
+    transcription: str,
+    chunks: asyncio.Queue,
+    tasks: list[asyncio.Task],
+    failures: list[Exception],
+) -> None:
+    """Start a synthesis task per LLM sentence and queue their outputs in chunk-id order."""
+    semaphore = asyncio.Semaphore(TTS_MAX_CONCURRENCY)
+    chunk_id = 0
+
+    def dispatch(text: str) -> None:
+        nonlocal chunk_id
+        out: asyncio.Queue = asyncio.Queue()
+        tasks.append(asyncio.create_task(
+            _synthesize(call_state, text, chunk_id, out, semaphore, failures)
+        ))
+        chunks.put_nowait(out)
+        chunk_id += 1
+
+    try:
+        async for sentence in call_state.llm_agent.generate_response(
+            transcription, call_state.history, call_state.stream_sid
+        ):
+            dispatch(sentence)
+    except LLMError as e:
+        logger.error(
+            "LLM response generation failed",
+            stream_sid=call_state.stream_sid,
+            error=str(e),
+        )
+        # Only apologise if nothing has been said yet this turn
+        if chunk_id == 0:
+            dispatch(LLM_FALLBACK_MESSAGE)
+    finally:
+        chunks.put_nowait(None)
+
+
+async def _reply_audio(call_state: CallState, transcription: str) -> AsyncGenerator[bytes, None]:
+    """Yield reply audio in order while later sentences are still generated and synthesized.
+
+    Up to TTS_MAX_CONCURRENCY sentences are synthesized at once; playback drains
+    them strictly in chunk-id order, with FLUSH_AUDIO after each sentence. Closing or cancelling the generator (barge-in)
+    cancels the LLM stream and every pending synthesis.
+    """
+    chunks: asyncio.Queue = asyncio.Queue()
+    tasks: list[asyncio.Task] = []
+    failures: list[Exception] = []
+    dispatcher = asyncio.create_task(
+        _dispatch_reply(call_state, transcription, chunks, tasks, failures)
+    )
+    try:
+        while (out := await chunks.get()) is not None:
+            while (audio := await out.get()) is not None:
+                yield audio
+            # Sentence done: let the streamer send its tail before the next one is ready
+            yield FLUSH_AUDIO
+    finally:
+        dispatcher.cancel()
+        for task in tasks:
+            task.cancel()
+        if failures:
+            # One aggregated report per reply rather than a log line per failed chunk
+            logger.warning("TTS chunks failed",
+                          stream_sid=call_state.stream_sid,
+                          failed_chunks=len(failures),
+                          total_chunks=len(tasks),
+                          last_error_type=type(failures[-1]).__name__,
+                          last_error=str(failures[-1]))
+
+
+async def stream_reply(
+    websocket: WebSocket,
+    call_state: CallState,
+    transcription: str,
     mark_id: str
 ) -> None:
-    """Stream TTS response to Twilio."""
+    """Generate the reply and stream its TTS audio to Twilio, followed by a mark."""
     try:
         # Add mark to pending set
         call_state.pending_marks.add(mark_id)
 
-        # Generate TTS stream
-        tts_stream = call_state.tts_engine.generate_speech_stream(
-            text, call_state.stream_sid
-        )
-
-        # Stream to Twilio
-        await call_state.audio_streamer.stream_to_twilio(
-            websocket, tts_stream, call_state.stream_sid, mark_id
-        )
+        # Stream to Twilio as sentences are generated and synthesized; aclosing runs the
+        # generator's cleanup (cancel LLM/TTS tasks) as soon as streaming stops, barge-in included
+        async with aclosing(_reply_audio(call_state, transcription)) as audio:
+            await call_state.audio_streamer.stream_to_twilio(
+                websocket, audio, call_state.stream_sid, mark_id
+            )
 
         logger.info("TTS streaming task completed",
                    stream_sid=call_state.stream_sid,
@@ -1,6 +1,7 @@
+import re
+from collections import deque
 import openai
-import asyncio
-from typing import Any, List, cast
+from typing import Any, AsyncGenerator, Deque, List, cast
 
 from exceptions import LLMError
 from config import Config, COLLECTIONS_AGENT_PROMPT
@@ -8,76 +9,104 @@ from core.logging import get_logger
 
 logger = get_logger()
 
+# Sentence boundary in streamed text: terminal punctuation followed by whitespace
+_SENTENCE_END = re.compile(r"[.!?]+\s")
+# Longest chunk handed to TTS when no sentence boundary has arrived yet
+_MAX_CHUNK_CHARS = 200
+
 
 class CollectionsAgent:
-    """LLM-powered collections agent with compliance constraints and short-term memory."""
+    """LLM-powered collections agent with compliance constraints.
+
+    Stateless and shared across calls; each call owns its short-term history
+    and passes it in on every turn.
+    """
 
-    def __init__(self, api_key: str, config: Config):
-        self.client = openai.OpenAI(api_key=api_key)
+    def __init__(self, client: openai.AsyncOpenAI, config: Config):
+        self.client = client
         self.config = config
         self.system_prompt = COLLECTIONS_AGENT_PROMPT
-        # Per-call short-term history: list of prior user/assistant turns
-        self._history: List[dict[str, Any]] = []
         # Limit the number of past turns we keep to bound cost
         self._max_history_messages: int = 10
 
-    def reset_history(self) -> None:
-        """Clear conversation history, e.g. when a call ends."""
-        self._history.clear()
+    def new_history(self) -> Deque[dict[str, Any]]:
+        """Return an empty per-call history that drops its oldest messages automatically."""
+        return deque(maxlen=self._max_history_messages)
 
-    async def generate_response(self, user_message: str, stream_sid: str) -> str:
+    async def generate_response(
+        self, user_message: str, history: Deque[dict[str, Any]], stream_sid: str
+    ) -> AsyncGenerator[str, None]:
         """
-        Generate a response as a collections agent, using short conversation history.
-        
+        Stream a response as a collections agent, one sentence at a time.
+
+        The completion is requested with ``stream=True`` and tokens are buffered
+        until a sentence boundary (or ``_MAX_CHUNK_CHARS``), so TTS can start on
+        the first sentence while the rest is still being generated. The turn is
+        recorded in ``history`` when the stream ends or is cancelled (e.g. on
+        barge-in), with whatever was generated.
+
         Args:
             user_message: The user's transcribed message
+            history: The call's prior user/assistant turns (from new_history); updated in place
             stream_sid: The stream SID for logging correlation
-            
-        Returns:
-            The generated response text
-            
+
+        Yields:
+            Complete sentences of the generated response
+
         Raises:
-            LLMError: If the LLM request fails
+            LLMError: If the LLM request fails or returns no content
         """
+        # System prompt first and unchanged across turns keeps the prefix cacheable
+        messages: List[dict[str, Any]] = [
+            {"role": "system", "content": self.system_prompt},
+            *history,
+            {"role": "user", "content": user_message},
+        ]
+        sentences: List[str] = []
+
         try:
-            # Build message list with system prompt, prior turns, and new user message
-            messages: List[dict[str, Any]] = [
-                {"role": "system", "content": self.system_prompt},
-                *self._history,
-                {"role": "user", "content": user_message},
-            ]
-
-            response = await asyncio.to_thread(
-                self.client.chat.completions.create,
+            stream = await self.client.chat.completions.create(
                 model=self.config.llm_model,
                 messages=cast(Any, messages),
                 max_tokens=self.config.llm_max_tokens,
                 temperature=self.config.llm_temperature,
+                stream=True,
             )
+            async with stream:
+                pending = ""
+                async for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if not delta:
+                        continue
+                    pending += delta
+                    # Emit every complete sentence buffered so far
+                    match = _SENTENCE_END.search(pending)
+                    while match:
+                        sentence = pending[: match.end()].strip()
+                        pending = pending[match.end():]
+                        if sentence:
+                            sentences.append(sentence)
+                            yield sentence
+                        match = _SENTENCE_END.search(pending)
+                    # Don't hold back an unusually long run-on sentence; cut at a word break
+                    if len(pending) > _MAX_CHUNK_CHARS:
+                        cut = pending.rfind(" ", 0, _MAX_CHUNK_CHARS)
+                        if cut <= 0:
+                            cut = _MAX_CHUNK_CHARS
+                        sentence = pending[:cut].strip()
+                        pending = pending[cut:]
+                        if sentence:
+                            sentences.append(sentence)
+                            yield sentence
 
-            content = response.choices[0].message.content
-            if not content:
+            tail = pending.strip()
+            if tail:
+                sentences.append(tail)
+                yield tail
+            if not sentences:
                 raise LLMError("LLM returned empty response")
-            
-            ai_response = content.strip()
-
-            # Update short-term memory with this turn and trim if needed
-            self._history.append({"role": "user", "content": user_message})
-            self._history.append({"role": "assistant", "content": ai_response})
-            if len(self._history) > self._max_history_messages:
-                # Drop oldest messages but keep ordering; always even length
-                excess = len(self._history) - self._max_history_messages
-                self._history = self._history[excess:]
-
-            logger.info(
-                "LLM response generated",
-                stream_sid=stream_sid,
-                user_message_length=len(user_message),
-                response_length=len(ai_response),
-                history_messages=len(self._history),
-            )
-
-            return ai_response
 
         except Exception as e:
             logger.error(
@@ -86,3 +115,20 @@ class CollectionsAgent:
                 error=str(e),
             )
             raise LLMError(f"Failed to generate LLM response: {e}") from e
+
+        finally:
+            if sentences:
+                ai_response = " ".join(sentences)
+
+                # Update short-term memory; the bounded deque evicts the oldest turn
+                history.append({"role": "user", "content": user_message})
+                history.append({"role": "assistant", "content": ai_response})
+
+                logger.info(
+                    "LLM response generated",
+                    stream_sid=stream_sid,
+                    user_message_length=len(user_message),
+                    response_length=len(ai_response),
+                    sentences=len(sentences),
+                    history_messages=len(history),
+                )
@@ -1,13 +1,14 @@
 """Twilio Media Streams WebSocket."""
 
-import json
+from typing import Any, Awaitable, Callable
+
+import orjson
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from pydantic import ValidationError
 
-from state import CallStateManager
+from state import CallState, CallStateManager
+from exceptions import CallCapacityError
 from core.logging import get_logger
-from core.constants import TwilioEvent
-from schemas import parse_twilio_message
+from core.constants import EVENT_KEY, STREAM_SID_KEY, TwilioEvent
 
 from handlers import handle_start, handle_media, handle_stop, handle_mark
 
@@ -15,6 +16,23 @@ logger = get_logger()
 
 router = APIRouter(tags=["media"])
 
+# Twilio event name -> handler: one dict lookup per frame instead of an if/elif chain
+_HANDLERS: dict[str, Callable[[WebSocket, dict[str, Any], CallState], Awaitable[None]]] = {
+    TwilioEvent.START: handle_start,
+    TwilioEvent.MEDIA: handle_media,
+    TwilioEvent.STOP: handle_stop,
+    TwilioEvent.MARK: handle_mark,
+}
+
+
+async def _receive_frame(websocket: WebSocket) -> str | bytes:
+    """Receive one text or binary frame as-is (orjson parses either)."""
+    message = await websocket.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", 1000), message.get("reason"))
+    text = message.get("text")
+    return text if text is not None else message["bytes"]
+
 
 @router.websocket("/media")
 async def media_websocket(
@@ -27,39 +45,39 @@ async def media_websocket(
 
     try:
         while True:
-            message = await websocket.receive_text()
+            message = await _receive_frame(websocket)
             try:
-                data = json.loads(message)
-            except json.JSONDecodeError as e:
+                data = orjson.loads(message)
+            except orjson.JSONDecodeError as e:
                 logger.warning("Invalid JSON in WebSocket message", error=str(e))
                 continue
 
-            try:
-                parsed = parse_twilio_message(data)
-            except ValidationError as e:
-                logger.warning("Invalid Twilio message shape", errors=e.errors(), raw=data)
+            # Route on the raw dict: only event and streamSid are needed here, so
+            # skip pydantic validation per frame
+            if not isinstance(data, dict):
+                logger.warning("Invalid Twilio message shape", raw=data)
                 continue
 
-            msg_type = parsed.event
-            sid = parsed.streamSid
+            msg_type = data.get(EVENT_KEY)
+            sid = data.get(STREAM_SID_KEY)
             if not sid:
                 logger.warning("No streamSid in message", message=data)
                 continue
 
+            try:
+                call_state, was_new = call_state_manager.get_or_create(sid)
+            except CallCapacityError as e:
+                logger.warning("Rejecting call at capacity", stream_sid=sid, error=str(e))
+                # 1013: try again later; the calls already in progress are kept
+                await websocket.close(code=1013)
+                return
             stream_sid = sid
-            was_new = not call_state_manager.exists(stream_sid)
-            call_state = call_state_manager.get_or_create(stream_sid)
             if was_new:
                 logger.info("New call started", stream_sid=stream_sid)
 
-            if msg_type == TwilioEvent.START:
-                await handle_start(websocket, data, call_state)
-            elif msg_type == TwilioEvent.MEDIA:
-                await handle_media(websocket, data, call_state)
-            elif msg_type == TwilioEvent.STOP:
-                await handle_stop(websocket, data, call_state)
-            elif msg_type == TwilioEvent.MARK:
-                await handle_mark(websocket, data, call_state)
+            handler = _HANDLERS.get(msg_type)
+            if handler is not None:
+                await handler(websocket, data, call_state)
             else:
                 logger.warning(
                     "Unknown message type",
@@ -1,8 +1,8 @@
 """Twilio voice webhook and TwiML."""
 
-import re
+from functools import lru_cache
 from fastapi import APIRouter, Request, HTTPException, Depends
-from fastapi.responses import HTMLResponse
+from fastapi.responses import Response
 from twilio.twiml.voice_response import VoiceResponse
 from twilio.request_validator import RequestValidator
 
@@ -12,23 +12,8 @@ from core.logging import get_logger
 
 logger = get_logger()
 
-# Strip optional scheme and path so we always build wss://host/media ourselves
-_HOST_STRIP = re.compile(r"^(?://|https?://|wss?://)?([^/]+).*$")
-
-
-def normalize_media_stream_url(public_host: str, path: str = "/media") -> str:
-    """Build a wss:// URL for Twilio Media Streams from PUBLIC_HOST.
-    Tolerates PUBLIC_HOST with or without scheme (e.g. https://example.com or example.com).
-    """
-    if not public_host or not public_host.strip():
-        return f"wss://localhost:8000{path}"
-    host = public_host.strip()
-    match = _HOST_STRIP.match(host)
-    if match:
-        host = match.group(1).rstrip("/")
-    if not host:
-        return f"wss://localhost:8000{path}"
-    return f"wss://{host}{path}"
+# X-Twilio-Signature is base64(HMAC-SHA1): always 28 characters
+_SIGNATURE_LENGTH = 28
 
 
 def get_config() -> Config:
@@ -36,9 +21,18 @@ def get_config() -> Config:
     raise ConfigurationError("Config not injected")  # pragma: no cover
 
 
-def get_validator(config: Config) -> RequestValidator:
-    """Return Twilio request validator for the given config."""
-    return RequestValidator(config.twilio_auth_token)
+@lru_cache(maxsize=8)
+def get_validator(auth_token: str) -> RequestValidator:
+    """Return a cached Twilio request validator for the given auth token."""
+    return RequestValidator(auth_token)
+
+
+@lru_cache(maxsize=8)
+def _twiml_body(media_stream_url: str) -> bytes:
+    """Return the (constant per URL) TwiML that connects the call to the media stream."""
+    response = VoiceResponse()
+    response.connect().stream(url=media_stream_url)
+    return str(response).encode()
 
 
 router = APIRouter(tags=["voice"])
@@ -48,22 +42,25 @@ router = APIRouter(tags=["voice"])
 async def voice_webhook(
     request: Request,
     config: Config = Depends(get_config),
-) -> HTMLResponse:
+) -> Response:
     """Handle incoming voice calls from Twilio; return TwiML to connect to WebSocket."""
     logger.info("Received voice webhook", path="/voice")
 
-    validator = get_validator(config)
-    url = str(request.url)
-    body = await request.body()
+    # Reject missing/malformed signatures before parsing the form or computing an HMAC
     signature = request.headers.get("X-Twilio-Signature")
-
-    if not validator.validate(url, body, signature or ""):
+    if not signature or len(signature) != _SIGNATURE_LENGTH:
         logger.warning("Invalid Twilio signature")
         raise HTTPException(status_code=403, detail="Invalid signature")
 
-    response = VoiceResponse()
-    stream_url = normalize_media_stream_url(config.public_host)
-    response.connect().stream(url=stream_url)
+    validator = get_validator(config.twilio_auth_token)
+    url = str(request.url)
+    # Twilio signs url + sorted form params; pass the parsed form (multi-value aware)
+    form = await request.form()
+
+    # RequestValidator compares digests in constant time
+    if not validator.validate(url, form, signature):
+        logger.warning("Invalid Twilio signature")
+        raise HTTPException(status_code=403, detail="Invalid signature")
 
     logger.info("Returning TwiML response")
-    return HTMLResponse(content=str(response), media_type="application/xml")
+    return Response(content=_twiml_body(config.media_stream_url), media_type="application/xml")
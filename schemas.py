@@ -1,4 +1,8 @@
-"""Pydantic schemas for API and WebSocket payloads."""
+"""Pydantic schemas for API and WebSocket payloads.
+
+The media WebSocket routes on the raw dict and does not validate frames; these
+models document the Twilio Media Streams message shapes.
+"""
 
 from typing import Any, Optional
 
@@ -41,7 +45,3 @@ class TwilioStopPayload(TwilioMessageBase):
 
     event: str = "stop"
 
-
-def parse_twilio_message(data: dict) -> TwilioMessageBase:
-    """Parse raw WebSocket JSON into a typed message (event + streamSid)."""
-    return TwilioMessageBase(**data)
@@ -1,64 +1,126 @@
 """Call state management for voice agent."""
 import asyncio
-from typing import Dict, Optional, Set
+import time
+from collections import OrderedDict, deque
+import httpx
+import openai
+from typing import Any, Deque, Optional, Set, Tuple
 from dataclasses import dataclass, field
 
-from stt import StreamingSTT
+from exceptions import CallCapacityError
+from stt import AsyncRealtimeSTT, StreamingSTT
 from llm import CollectionsAgent
 from tts import ElevenLabsTTS, TwilioAudioStreamer
 from config import Config
+from core.logging import get_logger
 
+logger = get_logger()
 
-@dataclass
+
+@dataclass(slots=True)
 class CallState:
-    """Per-call state management."""
+    """Per-call state management.
+
+    The STT/LLM/TTS engines are shared across calls (owned by CallStateManager);
+    only conversation history, mark bookkeeping and the in-flight TTS task are per call.
+    """
     stream_sid: str
-    stt_processor: StreamingSTT
+    stt_processor: StreamingSTT | AsyncRealtimeSTT
     llm_agent: CollectionsAgent
     tts_engine: ElevenLabsTTS
     audio_streamer: TwilioAudioStreamer
+    history: Deque[dict[str, Any]] = field(default_factory=deque)
     is_speaking: bool = False
     current_tts_task: Optional[asyncio.Task] = None
     mark_id: int = 0
     pending_marks: Set[str] = field(default_factory=set)
+    # Inbound mu-law not yet handed to STT (see StreamingSTT.batch_bytes)
+    audio_ring: bytearray = field(default_factory=bytearray)
+    # Refreshed on every frame; idle states past call_state_ttl_s are evicted
+    last_seen: float = field(default_factory=time.monotonic)
+
+    def close(self) -> None:
+        """Cancel in-flight TTS and release per-stream STT state."""
+        if self.current_tts_task and not self.current_tts_task.done():
+            self.current_tts_task.cancel()
+        self.stt_processor.cleanup_stream_state(self.stream_sid)
 
 
 class CallStateManager:
-    """Manages call states for active voice calls."""
-    
-    def __init__(self, config: Config):
+    """Manages call states for active voice calls.
+
+    States are normally removed when the WebSocket closes; as a safety net, states
+    idle for longer than ``call_state_ttl_s`` are evicted whenever a new call is
+    registered. Active calls are never evicted: at ``max_active_calls`` new calls
+    are rejected with CallCapacityError.
+    """
+
+    def __init__(
+        self,
+        config: Config,
+        openai_client: openai.AsyncOpenAI,
+        tts_client: httpx.AsyncClient,
+    ):
         self.config = config
-        self._call_states: Dict[str, CallState] = {}
-    
-    def get_or_create(self, stream_sid: str) -> CallState:
-        """Get existing call state or create a new one."""
-        if stream_sid not in self._call_states:
-            self._call_states[stream_sid] = CallState(
-                stream_sid=stream_sid,
-                stt_processor=StreamingSTT(self.config.openai_api_key, self.config),
-                llm_agent=CollectionsAgent(self.config.openai_api_key, self.config),
-                tts_engine=ElevenLabsTTS(self.config.elevenlabs_api_key, self.config),
-                audio_streamer=TwilioAudioStreamer(self.config)
+        # Least recently seen first, so expired states are found at the front
+        self._call_states: OrderedDict[str, CallState] = OrderedDict()
+        # Engines are built once and shared by every call
+        self.stt_processor: StreamingSTT | AsyncRealtimeSTT = (
+            AsyncRealtimeSTT(config.openai_api_key, config)
+            if config.stt_backend == "realtime"
+            else StreamingSTT(openai_client, config)
+        )
+        self.llm_agent = CollectionsAgent(openai_client, config)
+        self.tts_engine = ElevenLabsTTS(tts_client, config)
+        self.audio_streamer = TwilioAudioStreamer(config)
+
+    def get_or_create(self, stream_sid: str) -> Tuple[CallState, bool]:
+        """Get existing call state or create a new one; returns ``(state, was_new)``.
+
+        Raises CallCapacityError if a new call would exceed ``max_active_calls``.
+        """
+        call_state = self._call_states.get(stream_sid)
+        if call_state is not None:
+            call_state.last_seen = time.monotonic()
+            self._call_states.move_to_end(stream_sid)
+            return call_state, False
+        self._evict_stale()
+        if len(self._call_states) >= self.config.max_active_calls:
+            raise CallCapacityError(
+                f"{len(self._call_states)} active calls (MAX_ACTIVE_CALLS)"
             )
-        return self._call_states[stream_sid]
-    
+        call_state = CallState(
+            stream_sid=stream_sid,
+            stt_processor=self.stt_processor,
+            llm_agent=self.llm_agent,
+            tts_engine=self.tts_engine,
+            audio_streamer=self.audio_streamer,
+            history=self.llm_agent.new_history(),
+        )
+        self._call_states[stream_sid] = call_state
+        return call_state, True
+
     def get(self, stream_sid: str) -> Optional[CallState]:
         """Get call state if it exists."""
         return self._call_states.get(stream_sid)
-    
+
     def exists(self, stream_sid: str) -> bool:
         """Check if a call state exists."""
         return stream_sid in self._call_states
-    
+
     def remove(self, stream_sid: str) -> None:
         """Remove call state and cleanup resources."""
-        if stream_sid in self._call_states:
-            call_state = self._call_states[stream_sid]
-            # Cancel any running TTS task
-            if call_state.current_tts_task and not call_state.current_tts_task.done():
-                call_state.current_tts_task.cancel()
-            # Reset LLM conversation history for this call
-            call_state.llm_agent.reset_history()
-            # Cleanup STT stream state
-            call_state.stt_processor.cleanup_stream_state(stream_sid)
-            del self._call_states[stream_sid]
+        call_state = self._call_states.pop(stream_sid, None)
+        if call_state is not None:
+            call_state.close()
+
+    def _evict_stale(self) -> None:
+        """Evict states idle for longer than the TTL (least recently seen first)."""
+        cutoff = time.monotonic() - self.config.call_state_ttl_s
+        while self._call_states:
+            oldest_sid, oldest = next(iter(self._call_states.items()))
+            if oldest.last_seen > cutoff:
+                break
+            del self._call_states[oldest_sid]
+            oldest.close()
+            logger.warning("Evicted stale call state", stream_sid=oldest_sid)
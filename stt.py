@@ -1,10 +1,14 @@
 import asyncio
 import io
 import time
-from typing import Optional, Dict
+import wave
+from typing import Dict, List, Optional, Union
 import numpy as np
-from pydub import AudioSegment
+import orjson
+import pybase64
 import openai
+from websockets.asyncio.client import ClientConnection, connect
+from websockets.exceptions import ConnectionClosed
 
 from exceptions import STTError, AudioProcessingError
 from config import Config
@@ -12,23 +16,52 @@ from core.logging import get_logger
 
 logger = get_logger()
 
+# Inbound audio batches: handle_media passes bytearray, callers may pass bytes or memoryview
+BytesLike = Union[bytes, bytearray, memoryview]
+
+
+def _build_mulaw_decode_lut() -> np.ndarray:
+    """Return the ITU-T G.711 mu-law decode table: byte code -> int16 sample."""
+    code = ~np.arange(256, dtype=np.int32) & 0xFF  # codes are transmitted bit-inverted
+    sign = code & 0x80
+    exponent = (code >> 4) & 0x07
+    mantissa = code & 0x0F
+    magnitude = (((mantissa << 3) + 0x84) << exponent) - 0x84
+    return np.where(sign, -magnitude, magnitude).astype(np.int16)
+
 
 class StreamState:
     """State for a single audio stream."""
-    
+
+    __slots__ = ("audio_chunks", "audio_bytes", "last_speech_time")
+
     def __init__(self):
-        self.audio_buffer = bytearray()
+        # Speech chunks of the current utterance, joined once at transcription
+        self.audio_chunks: List[BytesLike] = []
+        self.audio_bytes: int = 0
         self.last_speech_time: Optional[float] = None
 
 
 class StreamingSTT:
     """Streaming Speech-to-Text with turn detection"""
 
-    def __init__(self, api_key: str, config: Config):
-        self.client = openai.OpenAI(api_key=api_key)
+    # G.711 decode is a single gather through this table (one lookup per sample)
+    _MULAW_LUT = _build_mulaw_decode_lut()
+    # Squared decoded amplitude of each code, so the VAD gets RMS from one gather
+    _MULAW_SQUARES = _MULAW_LUT.astype(np.int64) ** 2
+
+    def __init__(self, client: openai.AsyncOpenAI, config: Config):
+        # Shared client from core.clients.create_openai_client (pooled keep-alive connections)
+        self.client = client
         self.silence_threshold_ms = config.silence_threshold_ms
+        self._silence_threshold_s = self.silence_threshold_ms / 1000
         self.sample_rate = config.stt_sample_rate
+        # Callers batch inbound audio to this many bytes (8-bit mu-law: 1 byte/sample)
+        self.batch_bytes = self.sample_rate * config.stt_batch_ms // 1000
         self.silence_threshold_db = config.silence_threshold_db
+        # Silence threshold as a mean square, derived once from the dB setting
+        rms_threshold = 32767.0 * 10 ** (self.silence_threshold_db / 20.0)
+        self._silence_mean_square = rms_threshold ** 2
         # Per-stream state management
         self._stream_states: Dict[str, StreamState] = {}
 
@@ -43,39 +76,40 @@ class StreamingSTT:
         if stream_sid in self._stream_states:
             del self._stream_states[stream_sid]
 
-    async def process_audio_chunk(self, audio_data: bytes, stream_sid: str) -> Optional[str]:
+    async def process_audio_chunk(self, audio_data: BytesLike, stream_sid: str) -> Optional[str]:
         """
         Process incoming audio chunk and return transcription if utterance complete.
-        Returns None if still collecting audio.
+        Returns None if still collecting audio. Accepts any bytes-like object
+        (bytes, bytearray, memoryview). Speech chunks are kept by reference until the
+        utterance is transcribed, so callers must not reuse the buffer they pass in.
         """
         stream_state = self._get_stream_state(stream_sid)
         
         try:
-            # Convert mu-law to linear PCM for processing
-            audio_segment = self._mulaw_to_pcm(audio_data)
-
-            # Simple silence detection (basic VAD)
-            is_silent = self._is_silent(audio_segment)
+            # Simple silence detection (basic VAD) straight on the mu-law bytes
+            is_silent = self._is_silent_mulaw(audio_data)
 
             if is_silent:
                 # Check if we've been silent long enough to end the utterance
                 if stream_state.last_speech_time is not None:
-                    silence_duration = time.time() - stream_state.last_speech_time
-                    if silence_duration >= (self.silence_threshold_ms / 1000):
+                    silence_duration = time.monotonic() - stream_state.last_speech_time
+                    if silence_duration >= self._silence_threshold_s:
                         # Utterance complete, transcribe accumulated audio
-                        if len(stream_state.audio_buffer) > 0:
+                        if stream_state.audio_bytes > 0:
                             transcription = await self._transcribe_audio(
-                                stream_state.audio_buffer, stream_sid
+                                stream_state.audio_chunks, stream_sid
                             )
                             # Reset buffer
-                            stream_state.audio_buffer = bytearray()
+                            stream_state.audio_chunks = []
+                            stream_state.audio_bytes = 0
                             stream_state.last_speech_time = None
                             return transcription
             else:
                 # Speech detected, reset silence timer
-                stream_state.last_speech_time = time.time()
-                # Accumulate audio in buffer
-                stream_state.audio_buffer.extend(audio_data)
+                stream_state.last_speech_time = time.monotonic()
+                # Accumulate audio (kept by reference; no regrowing buffer)
+                stream_state.audio_chunks.append(audio_data)
+                stream_state.audio_bytes += len(audio_data)
 
             return None
         except Exception as e:
@@ -84,57 +118,51 @@ class StreamingSTT:
                         error=str(e))
             raise AudioProcessingError(f"Failed to process audio chunk: {e}") from e
 
-    def _mulaw_to_pcm(self, mulaw_data: bytes) -> AudioSegment:
-        """Convert mu-law audio to PCM."""
+    def _mulaw_to_int16(self, mulaw_data: bytes) -> np.ndarray:
+        """Convert mu-law audio to int16 PCM samples."""
         try:
-            # Convert mu-law bytes to numpy array
-            mulaw_array = np.frombuffer(mulaw_data, dtype=np.uint8)
-
-            # Mu-law to linear conversion
-            # mu-law formula: y = sign(x) * (2^8) * ln(1 + μ| x |) / ln(1 + μ)
-            # where μ = 255 for standard mu-law
-            mu = 255.0
-            linear = np.sign(mulaw_array - 128) * (1.0 / mu) * ((1.0 + mu) ** np.abs(mulaw_array - 128) - 1.0)
-            linear = linear * 32767  # Scale to 16-bit
-
-            # Convert to AudioSegment
-            pcm_data = linear.astype(np.int16).tobytes()
-            return AudioSegment(pcm_data, frame_rate=self.sample_rate, sample_width=2, channels=1)
+            return self._MULAW_LUT[np.frombuffer(mulaw_data, dtype=np.uint8)]
         except Exception as e:
             logger.error("Mu-law to PCM conversion failed", error=str(e))
             raise AudioProcessingError(f"Failed to convert mu-law to PCM: {e}") from e
 
-    def _is_silent(self, audio_segment: AudioSegment) -> bool:
-        """Simple silence detection based on RMS amplitude."""
-        try:
-            rms = audio_segment.rms
-            if rms == 0:
-                return True
-
-            # Convert RMS to dB
-            db = 20 * np.log10(rms / 32767.0)
-            return db < self.silence_threshold_db
-        except Exception:
+    def _int16_to_wav(self, pcm: np.ndarray) -> io.BytesIO:
+        """Wrap int16 PCM samples in an in-memory mono WAV file (stdlib, no ffmpeg)."""
+        wav_buffer = io.BytesIO()
+        with wave.open(wav_buffer, "wb") as wav_file:
+            wav_file.setnchannels(1)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(self.sample_rate)
+            wav_file.writeframes(pcm.tobytes())
+        wav_buffer.seek(0)
+        return wav_buffer
+
+    def _is_silent_mulaw(self, mulaw_data: BytesLike) -> bool:
+        """Simple silence detection based on RMS amplitude, straight from mu-law codes.
+
+        Looks up each code's squared amplitude instead of decoding to PCM; the batch is
+        silent when its RMS is below the SILENCE_THRESHOLD_DB level.
+        """
+        codes = np.frombuffer(mulaw_data, dtype=np.uint8)
+        if codes.size == 0:
             return True
+        return self._MULAW_SQUARES[codes].mean() < self._silence_mean_square
+
+    def _encode_wav_sync(self, audio_chunks: List[BytesLike]) -> io.BytesIO:
+        """Join the utterance once and convert mu-law to WAV (CPU-bound)."""
+        return self._int16_to_wav(self._mulaw_to_int16(b"".join(audio_chunks)))
 
-    async def _transcribe_audio(self, audio_buffer: bytearray, stream_sid: str) -> Optional[str]:
+    async def _transcribe_audio(self, audio_chunks: List[BytesLike], stream_sid: str) -> Optional[str]:
         """Transcribe accumulated audio using OpenAI Whisper."""
         try:
-            # Convert mu-law buffer to WAV
-            audio_segment = self._mulaw_to_pcm(bytes(audio_buffer))
-
-            # Export to WAV bytes
-            wav_buffer = io.BytesIO()
-            audio_segment.export(wav_buffer, format="wav")
-            wav_buffer.seek(0)
-
-            # Transcribe with Whisper (run sync API in thread pool)
-            response = await asyncio.to_thread(
-                lambda: self.client.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=("audio.wav", wav_buffer, "audio/wav"),
-                    response_format="text",
-                )
+            # Decode and WAV-encode in the thread pool, off the event loop
+            wav_buffer = await asyncio.to_thread(self._encode_wav_sync, audio_chunks)
+
+            # Upload over the shared async client (no thread, pooled TLS connection)
+            response = await self.client.audio.transcriptions.create(
+                model="whisper-1",
+                file=("audio.wav", wav_buffer, "audio/wav"),
+                response_format="text",
             )
 
             transcription = response.strip()
@@ -149,3 +177,124 @@ class StreamingSTT:
                         stream_sid=stream_sid,
                         error=str(e))
             raise STTError(f"Failed to transcribe audio: {e}") from e
+
+
+class RealtimeStreamState:
+    """Realtime transcription session for a single audio stream."""
+
+    __slots__ = ("connection", "transcripts", "reader")
+
+    def __init__(self, connection: ClientConnection):
+        self.connection = connection
+        self.transcripts: asyncio.Queue[str] = asyncio.Queue()
+        self.reader: Optional[asyncio.Task] = None
+
+
+class AsyncRealtimeSTT:
+    """Streaming Speech-to-Text over the OpenAI Realtime transcription WebSocket.
+
+    Drop-in alternative to StreamingSTT (STT_BACKEND=realtime): mu-law batches are
+    pushed as they arrive and the server does turn detection, so the transcript is
+    ready as soon as the caller stops speaking instead of after a Whisper upload.
+    """
+
+    REALTIME_URL = "wss://api.openai.com/v1/realtime?intent=transcription"
+
+    def __init__(self, api_key: str, config: Config):
+        self.api_key = api_key
+        self.model = config.stt_realtime_model
+        self.silence_threshold_ms = config.silence_threshold_ms
+        # Same batching contract as StreamingSTT (8-bit mu-law: 1 byte/sample)
+        self.batch_bytes = config.stt_sample_rate * config.stt_batch_ms // 1000
+        # Per-stream session management
+        self._stream_states: Dict[str, RealtimeStreamState] = {}
+
+    async def _open_stream(self, stream_sid: str) -> RealtimeStreamState:
+        """Open and configure a transcription session for a stream."""
+        connection = await connect(
+            self.REALTIME_URL,
+            additional_headers={
+                "Authorization": f"Bearer {self.api_key}",
+                "OpenAI-Beta": "realtime=v1",
+            },
+        )
+        try:
+            await connection.send(orjson.dumps({
+                "type": "transcription_session.update",
+                "session": {
+                    "input_audio_format": "g711_ulaw",
+                    "input_audio_transcription": {"model": self.model},
+                    "turn_detection": {
+                        "type": "server_vad",
+                        "silence_duration_ms": self.silence_threshold_ms,
+                    },
+                },
+            }).decode())
+        except BaseException:
+            # The reader task owns closing the connection, but it has not started yet
+            await connection.close()
+            raise
+        stream_state = RealtimeStreamState(connection)
+        stream_state.reader = asyncio.create_task(
+            self._read_transcripts(stream_state, stream_sid)
+        )
+        self._stream_states[stream_sid] = stream_state
+        logger.info("Realtime STT session opened", stream_sid=stream_sid)
+        return stream_state
+
+    async def _read_transcripts(self, stream_state: RealtimeStreamState, stream_sid: str) -> None:
+        """Queue completed transcripts until the session closes or is cancelled."""
+        try:
+            async for message in stream_state.connection:
+                event = orjson.loads(message)
+                event_type = event.get("type")
+                if event_type == "conversation.item.input_audio_transcription.completed":
+                    transcription = (event.get("transcript") or "").strip()
+                    if transcription:
+                        stream_state.transcripts.put_nowait(transcription)
+                elif event_type == "error":
+                    logger.error("Realtime STT error",
+                                stream_sid=stream_sid,
+                                error=event.get("error"))
+        except ConnectionClosed:
+            pass
+        finally:
+            await stream_state.connection.close()
+
+    def cleanup_stream_state(self, stream_sid: str) -> None:
+        """Close the session for a stream. Call when call ends."""
+        stream_state = self._stream_states.pop(stream_sid, None)
+        if stream_state is not None and stream_state.reader is not None:
+            # The reader closes the connection on its way out
+            stream_state.reader.cancel()
+
+    async def process_audio_chunk(self, audio_data: BytesLike, stream_sid: str) -> Optional[str]:
+        """
+        Push an audio chunk to the session and return a transcription if one has completed.
+        Returns None otherwise.
+        """
+        try:
+            stream_state = self._stream_states.get(stream_sid)
+            if stream_state is None:
+                stream_state = await self._open_stream(stream_sid)
+
+            await stream_state.connection.send(orjson.dumps({
+                "type": "input_audio_buffer.append",
+                "audio": pybase64.b64encode(audio_data).decode(),
+            }).decode())
+
+            try:
+                transcription = stream_state.transcripts.get_nowait()
+            except asyncio.QueueEmpty:
+                return None
+            logger.info("Transcription completed",
+                       stream_sid=stream_sid,
+                       transcription_length=len(transcription))
+            return transcription
+        except Exception as e:
+            logger.error("Realtime STT failed",
+                        stream_sid=stream_sid,
+                        error=str(e))
+            # Drop the broken session; the next chunk opens a fresh one
+            self.cleanup_stream_state(stream_sid)
+            raise STTError(f"Failed to stream audio for transcription: {e}") from e
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Audio path tests: G.711 mu-law tables, silence detection and outbound media framing
+"""
+
+import asyncio
+import base64
+import os
+import sys
+import types
+from unittest.mock import Mock
+
+import numpy as np
+import orjson
+
+# Add current directory to path for imports
+sys.path.insert(0, os.path.dirname(__file__))
+
+from stt import StreamingSTT
+from tts import FLUSH_AUDIO, ElevenLabsTTS, TwilioAudioStreamer
+
+# 200 ms STT batch at 8 kHz
+_BATCH_SAMPLES = 1600
+
+
+def test_mulaw_decode_table():
+    """Decode table matches fixed ITU-T G.711 values (codes are sent bit-inverted)."""
+    lut = StreamingSTT._MULAW_LUT
+    assert lut.dtype == np.int16 and lut.shape == (256,)
+
+    expected = {
+        0xFF: 0, 0x7F: 0,  # +0 / -0
+        0xFE: 8, 0x7E: -8,
+        0xEF: 132, 0x6F: -132,
+        0x80: 32124, 0x00: -32124,  # loudest codes
+    }
+    assert {code: int(lut[code]) for code in expected} == expected
+    # Each half of the table is monotonic in magnitude
+    assert np.all(np.diff(lut[0x80:].astype(np.int32)) < 0)
+    assert np.all(np.diff(lut[:0x80].astype(np.int32)) > 0)
+
+
+def test_mulaw_encode_table():
+    """Encode table gives fixed G.711 codes and round-trips within the quantisation step."""
+    lut = ElevenLabsTTS._MULAW_LUT
+    assert lut.dtype == np.uint8 and lut.shape == (65536,)
+
+    expected = {
+        0: 0xFF, -1: 0x7E,
+        8: 0xFE, -8: 0x7E,
+        100: 0xF2, -100: 0x72,
+        1000: 0xCE, -1000: 0x4E,
+        32124: 0x80, -32124: 0x00,
+        32767: 0x80, -32768: 0x00,  # clipped to the loudest code
+    }
+    encoded = {
+        sample: int(lut[np.array(sample, dtype=np.int16).view(np.uint16)])
+        for sample in expected
+    }
+    assert encoded == expected
+
+    # decode(encode(x)) stays within one G.711 step (8 at the bottom, ~1/32 of |x| above)
+    samples = np.arange(-32768, 32768).astype(np.int16)
+    decoded = StreamingSTT._MULAW_LUT[lut.take(samples.view(np.uint16))].astype(np.int32)
+    error = np.abs(decoded - samples)
+    assert np.all(error <= np.abs(samples.astype(np.int32)) // 32 + 8)
+
+
+def _stt(silence_threshold_db: float = -40.0) -> StreamingSTT:
+    config = types.SimpleNamespace(
+        silence_threshold_ms=1500,
+        stt_sample_rate=8000,
+        stt_batch_ms=200,
+        silence_threshold_db=silence_threshold_db,
+    )
+    return StreamingSTT(Mock(), config)
+
+
+def _to_mulaw(samples: np.ndarray) -> bytes:
+    """Encode float samples as mu-law via the TTS encode table."""
+    pcm = np.clip(np.round(samples), -32768, 32767).astype(np.int16)
+    return ElevenLabsTTS._MULAW_LUT.take(pcm.view(np.uint16)).tobytes()
+
+
+def _sine(rms: float) -> np.ndarray:
+    t = np.arange(_BATCH_SAMPLES) / 8000
+    return rms * np.sqrt(2) * np.sin(2 * np.pi * 440 * t)
+
+
+def _noise(rms: float) -> np.ndarray:
+    return np.random.default_rng(0).normal(0.0, rms, _BATCH_SAMPLES)
+
+
+def test_silence_threshold_is_rms():
+    """Tones and noise flip between silent and speech at the threshold RMS."""
+    stt = _stt(-40.0)
+    rms_threshold = 32767.0 * 10 ** (-40.0 / 20.0)  # ~328
+
+    for signal in (_sine, _noise):
+        assert stt._is_silent_mulaw(_to_mulaw(signal(rms_threshold * 0.9)))
+        assert not stt._is_silent_mulaw(_to_mulaw(signal(rms_threshold * 1.1)))
+
+
+def test_partial_speech_batch_is_not_silent():
+    """A batch that is only partly loud speech still counts as speech."""
+    stt = _stt(-40.0)
+    samples = np.zeros(_BATCH_SAMPLES)
+    speech = _sine(32767.0 * 10 ** (-16.0 / 20.0))
+    samples[: _BATCH_SAMPLES * 3 // 10] = speech[: _BATCH_SAMPLES * 3 // 10]
+
+    assert not stt._is_silent_mulaw(_to_mulaw(samples))
+
+
+def test_digital_silence_and_empty_batch():
+    """Mu-law silence (0xFF) and an empty batch are silent."""
+    stt = _stt(-40.0)
+    assert stt._is_silent_mulaw(b"\xff" * _BATCH_SAMPLES)
+    assert stt._is_silent_mulaw(b"")
+
+
+class _FakeWebSocket:
+    """Records every text frame sent to Twilio."""
+
+    def __init__(self):
+        self.messages = []
+
+    async def send_text(self, text: str) -> None:
+        self.messages.append(orjson.loads(text))
+
+
+async def _chunks(sizes):
+    """Yield chunks of the given sizes carrying a running byte counter (never 0xFF)."""
+    offset = 0
+    for size in sizes:
+        yield bytes((offset + i) % 0xFF for i in range(size))
+        offset += size
+
+
+def _stream(sizes, chunk_size=160, frames_per_message=5) -> list:
+    config = types.SimpleNamespace(
+        tts_chunk_size=chunk_size, tts_frames_per_message=frames_per_message
+    )
+    websocket = _FakeWebSocket()
+    streamer = TwilioAudioStreamer(config)
+    asyncio.run(streamer.stream_to_twilio(websocket, _chunks(sizes), "test-stream-123", "mark_1"))
+    return websocket.messages
+
+
+def test_media_messages_are_whole_frames():
+    """Odd-sized network chunks go out as whole frames, bytes conserved, tail padded, mark last."""
+    sizes = [1, 159, 161, 333, 7, 1000, 45]
+    messages = _stream(sizes)
+
+    *media, mark = messages
+    assert mark == {"event": "mark", "streamSid": "test-stream-123", "mark": {"name": "mark_1"}}
+    assert media and all(message["event"] == "media" for message in media)
+
+    payloads = [base64.b64decode(message["media"]["payload"]) for message in media]
+    assert all(len(payload) % 160 == 0 for payload in payloads)
+    assert all(0 < len(payload) <= 160 * 5 for payload in payloads)
+
+    sent = b"".join(payloads)
+    total = sum(sizes)
+    assert sent[:total] == bytes(i % 0xFF for i in range(total))
+    assert sent[total:] == b"\xff" * (-total % 160)
+
+
+def test_small_chunks_are_batched():
+    """Chunks smaller than a message are held until tts_frames_per_message frames build up."""
+    messages = _stream([100] * 20)  # 2000 bytes in 100-byte network chunks
+
+    payload_sizes = [
+        len(base64.b64decode(message["media"]["payload"]))
+        for message in messages
+        if message["event"] == "media"
+    ]
+    assert payload_sizes == [800, 800, 480]
+
+
+def test_sentence_tail_sent_before_next_sentence():
+    """A FLUSH_AUDIO between sentences sends the first sentence's tail without waiting."""
+    config = types.SimpleNamespace(tts_chunk_size=160, tts_frames_per_message=5)
+    websocket = _FakeWebSocket()
+    sent_before_second_sentence = []
+
+    async def reply():
+        yield b"\x01" * 1000  # one full message plus a 200-byte tail
+        yield FLUSH_AUDIO
+        # Next sentence is still being generated and synthesized
+        await asyncio.sleep(0.05)
+        sent_before_second_sentence.extend(
+            base64.b64decode(message["media"]["payload"]) for message in websocket.messages
+        )
+        yield b"\x02" * 100
+        yield FLUSH_AUDIO
+
+    streamer = TwilioAudioStreamer(config)
+    asyncio.run(streamer.stream_to_twilio(websocket, reply(), "test-stream-123", "mark_1"))
+
+    assert [len(payload) for payload in sent_before_second_sentence] == [800, 320]
+    assert sent_before_second_sentence[1] == b"\x01" * 200 + b"\xff" * 120
+
+    *media, mark = websocket.messages
+    assert mark["event"] == "mark"
+    assert base64.b64decode(media[-1]["media"]["payload"]) == b"\x02" * 100 + b"\xff" * 60
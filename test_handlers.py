@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Reply pipeline tests: LLM sentences -> concurrent TTS -> ordered audio
+"""
+
+import asyncio
+import os
+import sys
+import types
+from unittest.mock import patch
+
+# Add current directory to path for imports
+sys.path.insert(0, os.path.dirname(__file__))
+
+import handlers
+from exceptions import LLMError, TTSError
+from tts import FLUSH_AUDIO, TwilioAudioStreamer
+
+
+def _call_state(sentences, fail_after=None, delays=None, failing=(), hang=()):
+    """A call state whose LLM yields ``sentences`` and whose TTS yields ``b"<text>:<n>"`` parts.
+
+    The LLM raises LLMError after ``fail_after`` sentences; TTS sleeps ``delays[text]``
+    before its first part, raises TTSError for ``failing`` texts and never finishes
+    ``hang`` texts.
+    """
+    delays = delays or {}
+
+    async def generate_response(transcription, history, stream_sid):
+        for i, sentence in enumerate(sentences):
+            if i == fail_after:
+                raise LLMError("stream dropped")
+            yield sentence
+        if fail_after == len(sentences):
+            raise LLMError("stream dropped")
+
+    async def generate_speech_stream(text, stream_sid):
+        await asyncio.sleep(delays.get(text, 0))
+        if text in failing:
+            raise TTSError("synthesis failed")
+        if text in hang:
+            await asyncio.Event().wait()
+        for part in range(2):
+            yield f"{text}:{part}".encode()
+            await asyncio.sleep(0)
+
+    return types.SimpleNamespace(
+        stream_sid="test-stream-123",
+        history=[],
+        llm_agent=types.SimpleNamespace(generate_response=generate_response),
+        tts_engine=types.SimpleNamespace(generate_speech_stream=generate_speech_stream),
+    )
+
+
+async def _collect(call_state, keep_flushes=False) -> list:
+    return [
+        audio
+        async for audio in handlers._reply_audio(call_state, "hello")
+        if keep_flushes or audio != FLUSH_AUDIO
+    ]
+
+
+def test_audio_order_kept_when_chunks_finish_out_of_order():
+    """Later sentences that synthesize first still play after earlier ones."""
+    call_state = _call_state(["a", "b", "c"], delays={"a": 0.05, "b": 0.02})
+
+    audio = asyncio.run(_collect(call_state))
+
+    assert audio == [b"a:0", b"a:1", b"b:0", b"b:1", b"c:0", b"c:1"]
+
+
+def test_flush_after_each_sentence():
+    """Each sentence's audio is followed by FLUSH_AUDIO so its tail is sent right away."""
+    call_state = _call_state(["a", "b"])
+
+    audio = asyncio.run(_collect(call_state, keep_flushes=True))
+
+    assert audio == [b"a:0", b"a:1", FLUSH_AUDIO, b"b:0", b"b:1", FLUSH_AUDIO]
+
+
+def test_failed_chunk_skipped_with_one_warning():
+    """A sentence whose TTS fails is skipped; failures are reported once per reply."""
+    call_state = _call_state(["a", "b", "c", "d"], failing=("b", "c"))
+
+    with patch.object(handlers, "logger") as logger:
+        audio = asyncio.run(_collect(call_state))
+
+    assert audio == [b"a:0", b"a:1", b"d:0", b"d:1"]
+    assert logger.warning.call_count == 1
+    assert logger.warning.call_args.kwargs["failed_chunks"] == 2
+    assert logger.warning.call_args.kwargs["total_chunks"] == 4
+
+
+def test_llm_failure_before_first_sentence_plays_fallback():
+    """If the LLM fails before saying anything, the fallback message is spoken."""
+    call_state = _call_state(["a"], fail_after=0)
+
+    audio = asyncio.run(_collect(call_state))
+
+    fallback = handlers.LLM_FALLBACK_MESSAGE
+    assert audio == [f"{fallback}:0".encode(), f"{fallback}:1".encode()]
+
+
+def test_llm_failure_after_first_sentence_keeps_partial_reply():
+    """If the LLM fails mid-reply, what was said is kept and no fallback is added."""
+    call_state = _call_state(["a", "b"], fail_after=2)
+
+    audio = asyncio.run(_collect(call_state))
+
+    assert audio == [b"a:0", b"a:1", b"b:0", b"b:1"]
+
+
+def test_cancelled_reply_leaves_no_pending_tasks():
+    """Cancelling the reply (barge-in) cancels the LLM dispatcher and every synthesis."""
+    call_state = _call_state(["a", "b", "c"], hang=("b", "c"))
+
+    async def scenario():
+        first_audio = asyncio.Event()
+
+        async def play():
+            async for _ in handlers._reply_audio(call_state, "hello"):
+                first_audio.set()
+
+        reply = asyncio.create_task(play())
+        await first_audio.wait()
+        reply.cancel()
+        await asyncio.gather(reply, return_exceptions=True)
+        # Let the cancelled tasks unwind
+        for _ in range(5):
+            await asyncio.sleep(0)
+        return {task for task in asyncio.all_tasks() if task is not asyncio.current_task()}
+
+    assert asyncio.run(scenario()) == set()
+
+
+def test_barge_in_closes_reply_generator_immediately():
+    """Cancelling stream_reply mid-send closes the reply generator before the task ends."""
+    call_state = _call_state(["a", "b"], hang=("b",))
+    call_state.pending_marks = set()
+    call_state.audio_streamer = TwilioAudioStreamer(
+        types.SimpleNamespace(tts_chunk_size=4, tts_frames_per_message=1)
+    )
+    generators = []
+    original_reply_audio = handlers._reply_audio
+
+    def reply_audio(*args):
+        generator = original_reply_audio(*args)
+        generators.append(generator)
+        return generator
+
+    async def scenario():
+        sending = asyncio.Event()
+
+        class BlockingWebSocket:
+            async def send_text(self, text):
+                sending.set()
+                await asyncio.Event().wait()
+
+        reply = asyncio.create_task(
+            handlers.stream_reply(BlockingWebSocket(), call_state, "hello", "mark_1")
+        )
+        await sending.wait()
+        reply.cancel()
+        await asyncio.gather(reply, return_exceptions=True)
+        # Closed (finally ran) without waiting for garbage collection
+        return generators[0].ag_frame is None
+
+    with patch.object(handlers, "_reply_audio", reply_audio):
+        assert asyncio.run(scenario())
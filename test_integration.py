@@ -4,43 +4,68 @@ Integration test for voice agent components
 Tests the core logic without requiring external dependencies
 """
 
-import json
+import re
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 
 # Add current directory to path for imports
 sys.path.insert(0, os.path.dirname(__file__))
 
-def test_websocket_message_parsing():
-    """Test that WebSocket messages are parsed correctly"""
-    # Mock Twilio messages
-    start_message = {
-        "event": "start",
-        "streamSid": "test-stream-123",
-        "accountSid": "test-account"
+from testutils import json as _json, read_json, read_text
+
+# Mock Twilio messages, built and serialized once at import
+_START_MESSAGE = {
+    "event": "start",
+    "streamSid": "test-stream-123",
+    "accountSid": "test-account"
+}
+
+_MEDIA_MESSAGE = {
+    "event": "media",
+    "streamSid": "test-stream-123",
+    "sequenceNumber": 1,
+    "media": {
+        "payload": "dGVzdCBhdWRpbw=="  # base64 "test audio"
     }
+}
 
-    media_message = {
-        "event": "media",
-        "streamSid": "test-stream-123",
-        "sequenceNumber": 1,
-        "media": {
-            "payload": "dGVzdCBhdWRpbw=="  # base64 "test audio"
-        }
+_MARK_MESSAGE = {
+    "event": "mark",
+    "streamSid": "test-stream-123",
+    "mark": {
+        "name": "test-mark-1"
     }
+}
 
-    mark_message = {
-        "event": "mark",
-        "streamSid": "test-stream-123",
-        "mark": {
-            "name": "test-mark-1"
-        }
-    }
+_START_JSON = _json.dumps(_START_MESSAGE)
+_MEDIA_JSON = _json.dumps(_MEDIA_MESSAGE)
+_MARK_JSON = _json.dumps(_MARK_MESSAGE)
+
+
+# Every component token in one scan; the zero-width lookahead lets overlapping
+# tokens (e.g. "Audio" inside playAudioFromBase64) all be found
+_TSX_TOKENS = re.compile(
+    rb"(?=(useState|useEffect|WebSocket|connectToServer|startRecording"
+    rb"|playAudioFromBase64|(?i:audio)|(?i:connect)))"
+)
 
-    parsed_start = json.loads(json.dumps(start_message))
-    parsed_media = json.loads(json.dumps(media_message))
-    parsed_mark = json.loads(json.dumps(mark_message))
 
+def _assert_contains(content, tokens) -> None:
+    """Assert every token occurs in content, reporting all missing ones at once."""
+    missing = [token for token in tokens if token not in content]
+    assert not missing, f"missing: {missing}"
+
+def test_websocket_message_parsing():
+    """Test that WebSocket messages are parsed correctly"""
+    parsed_start = _json.loads(_START_JSON)
+    parsed_media = _json.loads(_MEDIA_JSON)
+    parsed_mark = _json.loads(_MARK_JSON)
+
+    assert parsed_start == _START_MESSAGE
+    assert parsed_media == _MEDIA_MESSAGE
+    assert parsed_mark == _MARK_MESSAGE
     assert parsed_start["event"] == "start"
     assert parsed_media["event"] == "media"
     assert parsed_mark["event"] == "mark"
@@ -48,122 +73,97 @@ def test_websocket_message_parsing():
 def test_call_state_management():
     """Test the CallState class logic"""
     class MockCallState:
+        __slots__ = ("stream_sid", "is_speaking", "mark_id", "pending_marks")
+
         def __init__(self, stream_sid: str):
             self.stream_sid = stream_sid
             self.is_speaking = False
             self.mark_id = 0
-            self.pending_marks = set()
+            # Bit i set = mark i still pending (mark ids are small increasing ints)
+            self.pending_marks = 0
 
     state = MockCallState("test-stream-123")
     assert state.stream_sid == "test-stream-123"
     assert state.is_speaking is False
     assert state.mark_id == 0
-    assert len(state.pending_marks) == 0
+    assert state.pending_marks == 0
 
-    state.pending_marks.add("mark-1")
-    assert "mark-1" in state.pending_marks
-    state.pending_marks.remove("mark-1")
-    assert "mark-1" not in state.pending_marks
+    state.pending_marks |= 1 << 1
+    assert state.pending_marks >> 1 & 1
+    state.pending_marks &= ~(1 << 1)
+    assert not state.pending_marks >> 1 & 1
 
 def test_frontend_component_structure():
     """Test that the frontend component has the right structure"""
-    component_path = "voice-agent-ui/src/components/VoiceAgentInterface.tsx"
-    with open(component_path, 'r') as f:
-        content = f.read()
-
-    assert "useState" in content
-    assert "useEffect" in content
-    assert "WebSocket" in content
-    assert "audio" in content.lower()
-    assert "connect" in content.lower()
-    assert "connectToServer" in content
-    assert "startRecording" in content
-    assert "playAudioFromBase64" in content
+    content = Path("voice-agent-ui/src/components/VoiceAgentInterface.tsx").read_bytes()
+    found = {match.group(1) for match in _TSX_TOKENS.finditer(content)}
+
+    _assert_contains(found, (
+        b"useState",
+        b"useEffect",
+        b"WebSocket",
+        b"connectToServer",
+        b"startRecording",
+        b"playAudioFromBase64",
+    ))
+    _assert_contains(b" ".join(found).lower(), (b"audio", b"connect"))
 
 def test_package_json_structure():
     """Test that package.json has correct dependencies"""
-    with open("voice-agent-ui/package.json", 'r') as f:
-        package_data = json.load(f)
+    package_data = read_json("voice-agent-ui/package.json")
 
-    assert "name" in package_data
-    assert "version" in package_data
-    assert "scripts" in package_data
-    assert "dependencies" in package_data
-
-    deps = package_data["dependencies"]
-    assert "next" in deps
-    assert "react" in deps
-    assert "tailwindcss" in deps
-
-    scripts = package_data["scripts"]
-    assert "dev" in scripts
-    assert "build" in scripts
+    assert {"name", "version", "scripts", "dependencies"} <= package_data.keys()
+    assert {"next", "react", "tailwindcss"} <= package_data["dependencies"].keys()
+    assert {"dev", "build"} <= package_data["scripts"].keys()
 
 def test_api_endpoints_structure():
     """Test that the API endpoints are properly defined."""
-    with open("app.py", "r") as f:
-        app_content = f.read()
-    with open("handlers.py", "r") as f:
-        handlers_content = f.read()
-    with open("routers/voice.py", "r") as f:
-        voice_content = f.read()
-    with open("routers/media.py", "r") as f:
-        media_content = f.read()
-
-    assert "include_router" in app_content
-    assert 'get("/")' in app_content
-    assert "/voice" in voice_content
-    assert "/media" in media_content
-    assert "handle_start" in handlers_content
-    assert "handle_media" in handlers_content
-    assert "handle_mark" in handlers_content
+    app_content = read_text("app.py")
+    handlers_content = read_text("handlers.py")
+    voice_content = read_text("routers/voice.py")
+    media_content = read_text("routers/media.py")
+
+    _assert_contains(app_content, ("include_router", 'get("/")'))
+    _assert_contains(voice_content, ("/voice",))
+    _assert_contains(media_content, ("/media",))
+    _assert_contains(handlers_content, ("handle_start", "handle_media", "handle_mark"))
 
 def test_requirements_structure():
     """Test that requirements.txt has necessary packages"""
-    with open("requirements.txt", 'r') as f:
-        content = f.read()
-
-    required_packages = [
-        "fastapi",
-        "uvicorn",
-        "websockets",
-        "twilio",
-        "openai",
-        "elevenlabs"
-    ]
-    for package in required_packages:
-        assert package in content.lower()
+    content = Path("requirements.txt").read_bytes().lower()
+
+    _assert_contains(content, (
+        b"fastapi",
+        b"uvicorn",
+        b"websockets",
+        b"twilio",
+        b"openai",
+        b"elevenlabs",
+    ))
 
 def test_websocket_simulation():
     """Simulate WebSocket message shapes expected by backend."""
-    start_message = {
-        "event": "start",
-        "streamSid": "test-stream-123",
-        "accountSid": "test-account"
-    }
-    assert start_message["event"] == "start"
-    assert "streamSid" in start_message
+    assert _START_MESSAGE["event"] == "start"
+    assert "streamSid" in _START_MESSAGE
 
-    media_message = {
-        "event": "media",
-        "streamSid": "test-stream-123",
-        "media": {"payload": "dGVzdA=="}
-    }
-    assert media_message["event"] == "media"
-    assert "payload" in media_message["media"]
+    assert _MEDIA_MESSAGE["event"] == "media"
+    assert "payload" in _MEDIA_MESSAGE["media"]
 
-    mark_message = {
-        "event": "mark",
-        "streamSid": "test-stream-123",
-        "mark": {"name": "test-mark"}
-    }
-    assert mark_message["event"] == "mark"
-    assert "name" in mark_message["mark"]
+    assert _MARK_MESSAGE["event"] == "mark"
+    assert "name" in _MARK_MESSAGE["mark"]
+
+def _run_one(test):
+    """Run a single test; return its name and the exception it raised (None if it passed)."""
+    try:
+        test()
+        return test.__name__, None
+    except Exception as e:
+        return test.__name__, e
 
 def run_all_tests():
     """Run all integration tests (when executed as script)."""
-    print("🚀 Running Voice Agent Integration Tests")
-    print("=" * 50)
+    # The report is collected and written once at the end
+    out = ["🚀 Running Voice Agent Integration Tests", "=" * 50]
 
     tests = [
         test_websocket_message_parsing,
@@ -175,28 +175,31 @@ def run_all_tests():
         test_websocket_simulation,
     ]
 
-    passed = 0
     total = len(tests)
 
-    for test in tests:
-        try:
-            test()
-            passed += 1
-        except Exception as e:
-            print(f"❌ {test.__name__}: {e}")
-
-    print("\n" + "=" * 50)
-    print(f"📊 Test Results: {passed}/{total} tests passed")
-
-    if passed == total:
-        print("🎉 All integration tests passed!")
-        print("\n💡 Next steps:")
-        print("1. Install dependencies: pip install -r requirements.txt")
-        print("2. Set up environment variables in .env")
-        print("3. Run the development script: ./dev.sh")
-        return True
-    print("⚠️  Some tests failed. Please check the output above.")
-    return False
+    # The tests are independent and mostly file I/O, so run them side by side
+    with ThreadPoolExecutor(max_workers=total) as executor:
+        results = list(executor.map(_run_one, tests))
+
+    out.extend(f"❌ {name}: {error}" for name, error in results if error is not None)
+    passed = sum(error is None for _, error in results)
+
+    out.append("\n" + "=" * 50)
+    out.append(f"📊 Test Results: {passed}/{total} tests passed")
+
+    success = passed == total
+    if success:
+        out.extend([
+            "🎉 All integration tests passed!",
+            "\n💡 Next steps:",
+            "1. Install dependencies: pip install -r requirements.txt",
+            "2. Set up environment variables in .env",
+            "3. Run the development script: ./dev.sh",
+        ])
+    else:
+        out.append("⚠️  Some tests failed. Please check the output above.")
+    sys.stdout.write("\n".join(out) + "\n")
+    return success
 
 if __name__ == "__main__":
     success = run_all_tests()
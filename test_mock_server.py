@@ -3,26 +3,70 @@
 Mock server test to validate basic FastAPI functionality without external dependencies
 """
 
+import inspect
 import os
 import sys
-from unittest.mock import Mock, patch, MagicMock
+import types
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from unittest.mock import Mock, patch
 
-# Mock config used when instantiating STT/LLM/TTS (they take api_key, config)
+import pytest
+
+from testutils import read_json, read_text
+
+
+# Mock config used when instantiating STT/LLM/TTS (they take a shared client and config)
 def _mock_config():
-    c = MagicMock()
-    c.silence_threshold_ms = 1500
-    c.stt_sample_rate = 8000
-    c.silence_threshold_db = -40.0
-    c.llm_model = "gpt-3.5-turbo"
-    c.llm_max_tokens = 150
-    c.llm_temperature = 0.7
-    c.elevenlabs_voice_id = "21m00Tcm4TlvDq8ikWAM"
-    c.tts_chunk_size = 320
-    return c
+    return types.SimpleNamespace(
+        silence_threshold_ms=1500,
+        stt_sample_rate=8000,
+        stt_batch_ms=200,
+        silence_threshold_db=-40.0,
+        llm_model="gpt-4o-mini",
+        llm_max_tokens=150,
+        llm_temperature=0.7,
+        elevenlabs_voice_id="21m00Tcm4TlvDq8ikWAM",
+        tts_chunk_size=160,
+        tts_frames_per_message=5,
+        tts_output_format="ulaw_8000",
+    )
+
+
+class _Stub:
+    """Cheap stand-in for anything a stubbed module exports: attributes and calls return itself.
+
+    Unlike Mock it records nothing and creates no child objects.
+    """
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return self
+
+    def __call__(self, *args, **kwargs):
+        return self
+
+
+_STUB = _Stub()
+
+
+def _stub_module(name: str) -> types.ModuleType:
+    """A bare module whose every public attribute (e.g. ``AudioSegment``) is ``_STUB``."""
+    module = types.ModuleType(name)
+    module.__all__ = []
+
+    def __getattr__(attr):
+        if attr.startswith("__"):
+            raise AttributeError(attr)
+        return _STUB
+
+    module.__getattr__ = __getattr__
+    return module
 
 
 def test_mock_imports():
-    """Test that we can mock the problematic imports and instantiate STT/LLM/TTS with (api_key, config)."""
+    """Test that we can mock the problematic imports and instantiate STT/LLM/TTS."""
     mock_modules = [
         'twilio.twiml.voice_response',
         'twilio.request_validator',
@@ -32,48 +76,74 @@ def test_mock_imports():
         'structlog'
     ]
     for module in mock_modules:
-        sys.modules[module] = Mock()
+        sys.modules[module] = _stub_module(module)
 
     from stt import StreamingSTT
     from llm import CollectionsAgent
     from tts import ElevenLabsTTS, TwilioAudioStreamer
 
     mock_cfg = _mock_config()
-    stt = StreamingSTT("mock-key", mock_cfg)
-    llm = CollectionsAgent("mock-key", mock_cfg)
-    tts = ElevenLabsTTS("mock-key", mock_cfg)
+    stt = StreamingSTT(Mock(), mock_cfg)
+    llm = CollectionsAgent(Mock(), mock_cfg)
+    tts = ElevenLabsTTS(Mock(), mock_cfg)
 
     assert stt is not None
     assert llm is not None
     assert tts is not None
 
-def test_app_mock():
-    """Test that the FastAPI app can be created with mocks (config and state manager)."""
+@contextmanager
+def _mocked_externals():
+    """Stub the external modules and engines the app import needs; yields the mock config."""
     mock_config = _mock_config()
     mock_config.twilio_auth_token = "mock-token"
     mock_config.openai_api_key = "mock-key"
     mock_config.elevenlabs_api_key = "mock-key"
     mock_config.public_host = "localhost:8000"
 
-    with patch.dict('sys.modules', {
-        'twilio.twiml.voice_response': Mock(),
-        'twilio.request_validator': Mock(),
-        'structlog': Mock(),
-    }):
-        with patch('config.Config.from_env', return_value=mock_config), \
-             patch('stt.StreamingSTT'), \
-             patch('llm.CollectionsAgent'), \
-             patch('tts.ElevenLabsTTS'), \
-             patch('tts.TwilioAudioStreamer'), \
-             patch('state.CallStateManager'):
-            if 'app' in sys.modules:
-                del sys.modules['app']
-            import app
-
-            assert hasattr(app, 'app')
-            assert app.app.title == "Voice Agent"
-            assert hasattr(app, 'config')
-            assert app.config is mock_config
+    with ExitStack() as stack:
+        stack.enter_context(patch.dict('sys.modules', {
+            'twilio.twiml.voice_response': Mock(),
+            'twilio.request_validator': Mock(),
+            'structlog': Mock(),
+        }))
+        stack.enter_context(patch('config.Config.from_env', return_value=mock_config))
+        for target in (
+            'stt.StreamingSTT',
+            'llm.CollectionsAgent',
+            'tts.ElevenLabsTTS',
+            'tts.TwilioAudioStreamer',
+            'state.CallStateManager',
+        ):
+            stack.enter_context(patch(target))
+        yield mock_config
+
+
+@pytest.fixture(scope="module")
+def mock_config():
+    """Install the stubs once for every test in this module that asks for them."""
+    with _mocked_externals() as config:
+        yield config
+
+
+def _import_app():
+    """Import app afresh under the active stubs (once per module)."""
+    sys.modules.pop('app', None)
+    import app
+    return app
+
+
+@pytest.fixture(scope="module")
+def mocked_app(mock_config):
+    """The app module, imported a single time and shared by the tests below."""
+    return _import_app()
+
+
+def test_app_mock(mocked_app, mock_config):
+    """Test that the FastAPI app can be created with mocks (config and state manager)."""
+    assert hasattr(mocked_app, 'app')
+    assert mocked_app.app.title == "Voice Agent"
+    assert hasattr(mocked_app, 'config')
+    assert mocked_app.config is mock_config
 
 def test_websocket_handler_logic():
     """Test that WebSocket handler functions exist in the handlers module."""
@@ -84,86 +154,79 @@ def test_websocket_handler_logic():
     assert callable(handle_stop)
     assert callable(handle_mark)
 
-def test_environment_setup():
+def test_environment_setup(mocked_app):
     """Test that app starts with config loaded (via mocked Config.from_env)."""
-    mock_config = _mock_config()
-    mock_config.twilio_auth_token = "mock-token"
-    mock_config.openai_api_key = "mock-key"
-    mock_config.elevenlabs_api_key = "mock-key"
-    mock_config.public_host = "localhost:8000"
-
-    with patch.dict('sys.modules', {
-        'twilio.twiml.voice_response': Mock(),
-        'twilio.request_validator': Mock(),
-        'structlog': Mock(),
-    }):
-        with patch('config.Config.from_env', return_value=mock_config), \
-             patch('stt.StreamingSTT'), \
-             patch('llm.CollectionsAgent'), \
-             patch('tts.ElevenLabsTTS'), \
-             patch('tts.TwilioAudioStreamer'), \
-             patch('state.CallStateManager'):
-            if 'app' in sys.modules:
-                del sys.modules['app']
-            import app
-
-            assert hasattr(app, 'config')
-            assert app.config.twilio_auth_token == "mock-token"
-            assert app.config.openai_api_key == "mock-key"
-            assert app.config.elevenlabs_api_key == "mock-key"
+    assert hasattr(mocked_app, 'config')
+    assert mocked_app.config.twilio_auth_token == "mock-token"
+    assert mocked_app.config.openai_api_key == "mock-key"
+    assert mocked_app.config.elevenlabs_api_key == "mock-key"
 
 def test_frontend_build_check():
     """Check frontend config files exist and have expected structure."""
-    import json
-
-    with open("voice-agent-ui/package.json", 'r') as f:
-        package = json.load(f)
-    assert "name" in package and "dependencies" in package
+    package = read_json("voice-agent-ui/package.json")
+    assert {"name", "dependencies"} <= package.keys()
 
-    with open("voice-agent-ui/next.config.js", 'r') as f:
-        next_config = f.read()
+    next_config = read_text("voice-agent-ui/next.config.js")
     assert "content" in next_config or "experimental" in next_config or "module" in next_config
 
-    with open("voice-agent-ui/tsconfig.json", 'r') as f:
-        ts_config = json.load(f)
+    ts_config = read_json("voice-agent-ui/tsconfig.json")
     assert "compilerOptions" in ts_config
 
-    with open("voice-agent-ui/tailwind.config.js", 'r') as f:
-        tailwind_config = f.read()
+    tailwind_config = read_text("voice-agent-ui/tailwind.config.js")
     assert "content" in tailwind_config
     assert "theme" in tailwind_config
 
 def run_mock_tests():
     """Run all mock tests (when executed as script)."""
-    print("🧪 Running Mock Server Tests (No External Dependencies)")
-    print("=" * 60)
+    # The report is collected and written once at the end
+    out = ["🧪 Running Mock Server Tests (No External Dependencies)", "=" * 60]
 
-    tests = [
+    # These patch/import via the process-wide sys.modules, so they run serially
+    serial_tests = [
         test_mock_imports,
         test_app_mock,
         test_websocket_handler_logic,
         test_environment_setup,
+    ]
+    # File-reading checks touch no shared state and run in a worker meanwhile
+    parallel_tests = [
         test_frontend_build_check,
     ]
 
     passed = 0
-    total = len(tests)
-
-    for test in tests:
-        try:
-            test()
-            passed += 1
-        except Exception as e:
-            print(f"❌ {test.__name__}: {e}")
-
-    print("\n" + "=" * 60)
-    print(f"📊 Mock Test Results: {passed}/{total} tests passed")
-
-    if passed == total:
-        print("🎉 All mock tests passed!")
-        return True
-    print("⚠️  Some mock tests failed. Check the issues above.")
-    return False
+    total = len(serial_tests) + len(parallel_tests)
+
+    with ThreadPoolExecutor(max_workers=len(parallel_tests)) as executor, ExitStack() as stack:
+        futures = {executor.submit(test): test for test in parallel_tests}
+        fixtures = {}
+        for test in serial_tests:
+            try:
+                # Same as the pytest fixtures: stubs installed and app imported once, on first use
+                params = inspect.signature(test).parameters
+                if params and not fixtures:
+                    fixtures["mock_config"] = stack.enter_context(_mocked_externals())
+                    fixtures["mocked_app"] = _import_app()
+                test(**{name: fixtures[name] for name in params})
+                passed += 1
+            except Exception as e:
+                out.append(f"❌ {test.__name__}: {e}")
+        for future, test in futures.items():
+            try:
+                future.result()
+                passed += 1
+            except Exception as e:
+                out.append(f"❌ {test.__name__}: {e}")
+
+    out.append("\n" + "=" * 60)
+    out.append(f"📊 Mock Test Results: {passed}/{total} tests passed")
+
+    success = passed == total
+    if success:
+        out.append("🎉 All mock tests passed!")
+    else:
+        out.append("⚠️  Some mock tests failed. Check the issues above.")
+    sys.stdout.write("\n".join(out) + "\n")
+    return success
 
 if __name__ == "__main__":
     success = run_mock_tests()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Call state manager tests: idle eviction and the active call limit
+"""
+
+import os
+import sys
+from unittest.mock import Mock
+
+import pytest
+
+# Add current directory to path for imports
+sys.path.insert(0, os.path.dirname(__file__))
+
+from config import Config
+from exceptions import CallCapacityError
+from state import CallStateManager
+
+
+def _manager(**overrides) -> CallStateManager:
+    config = Config(
+        twilio_auth_token="mock-token",
+        openai_api_key="mock-key",
+        elevenlabs_api_key="mock-key",
+        **overrides,
+    )
+    return CallStateManager(config, Mock(), Mock())
+
+
+def test_active_call_outlives_ttl():
+    """A call that keeps sending frames is kept however long it runs."""
+    manager = _manager(call_state_ttl_s=60)
+    call_state, was_new = manager.get_or_create("long-call")
+    assert was_new
+
+    # Created long ago but seen just now: still active
+    call_state.last_seen -= 3600
+    assert manager.get_or_create("long-call") == (call_state, False)
+    manager.get_or_create("new-call")
+
+    assert manager.get("long-call") is call_state
+
+
+def test_idle_call_is_evicted():
+    """A state with no frames for longer than the TTL is dropped on the next new call."""
+    manager = _manager(call_state_ttl_s=60)
+    idle, _ = manager.get_or_create("idle-call")
+    active, _ = manager.get_or_create("active-call")
+    idle.last_seen -= 61
+
+    manager.get_or_create("new-call")
+
+    assert not manager.exists("idle-call")
+    assert manager.get("active-call") is active
+
+
+def test_new_call_rejected_at_capacity():
+    """At max_active_calls a new call is rejected and in-progress calls are kept."""
+    manager = _manager(max_active_calls=2)
+    first, _ = manager.get_or_create("call-1")
+    second, _ = manager.get_or_create("call-2")
+
+    with pytest.raises(CallCapacityError):
+        manager.get_or_create("call-3")
+
+    assert manager.get("call-1") is first
+    assert manager.get("call-2") is second
+    assert not manager.exists("call-3")
+
+    # Frames for calls already in progress still resolve
+    assert manager.get_or_create("call-1") == (first, False)
@@ -0,0 +1,25 @@
+"""
+Shared helpers for the test modules (JSON codec and cached repo file reads)
+"""
+
+from functools import lru_cache
+from pathlib import Path
+
+try:
+    import orjson as json
+except ImportError:  # orjson is in requirements.txt; fall back if it isn't installed
+    import json
+
+__all__ = ["json", "read_text", "read_json"]
+
+
+@lru_cache(maxsize=32)
+def read_text(path: str) -> str:
+    """Read a repo file once per process (tests re-read the same few files)."""
+    return Path(path).read_text(encoding="utf-8")
+
+
+@lru_cache(maxsize=8)
+def read_json(path: str):
+    """Parse a repo JSON file once per process."""
+    return json.loads(Path(path).read_bytes())
@@ -1,38 +1,74 @@
 import asyncio
 import io
-import json
-import base64
+import logging
 from typing import AsyncGenerator, Optional
 import httpx
 from pydub import AudioSegment
 import numpy as np
+import orjson
+import pybase64
 
 from exceptions import TTSError, AudioProcessingError
 from config import Config
 from core.logging import get_logger
-from core.constants import EVENT_KEY, STREAM_SID_KEY, MEDIA_KEY, PAYLOAD_KEY, MARK_KEY, MARK_NAME_KEY
+from core.constants import (
+    MARK_MESSAGE_TEMPLATE,
+    MEDIA_MESSAGE_PREFIX_TEMPLATE,
+    MEDIA_MESSAGE_SUFFIX,
+)
 
 logger = get_logger()
 
 
+def _build_mulaw_encode_lut() -> np.ndarray:
+    """ITU-T G.711 mu-law code for every int16 sample, indexed by its uint16 bit pattern.
+
+    Same segmented encoding as the reference g711.c / audioop.lin2ulaw, so it
+    round-trips with the decode table in stt.py and is what Twilio expects.
+    """
+    samples = np.arange(65536, dtype=np.uint16).view(np.int16).astype(np.int32)
+    pcm = samples >> 2  # 14-bit magnitude domain
+    mask = np.where(pcm < 0, 0x7F, 0xFF)
+    magnitude = np.minimum(np.abs(pcm), 8159) + 0x21  # clip, then add bias
+    segment_ends = np.array([0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF, 0x1FFF])
+    segment = np.searchsorted(segment_ends, magnitude)
+    code = (segment << 4) | ((magnitude >> (segment + 1)) & 0x0F)
+    code = np.where(segment >= 8, 0x7F, code)  # past the last segment: max magnitude
+    return (code ^ mask).astype(np.uint8)
+
+
+# Accept header for each supported ElevenLabs output_format (see Config.tts_output_format)
+_ACCEPT_BY_FORMAT = {
+    "ulaw_8000": "audio/basic",
+    "pcm_8000": "audio/pcm",
+    "mp3": "audio/mpeg",
+}
+
+
 class ElevenLabsTTS:
     """ElevenLabs streaming TTS with mu-law conversion"""
 
-    def __init__(self, api_key: str, config: Config):
-        self.api_key = api_key
+    # int16 has only 65536 values: G.711 encode is one lookup per sample, table built at import
+    _MULAW_LUT = _build_mulaw_encode_lut()
+
+    def __init__(self, client: httpx.AsyncClient, config: Config):
+        # Shared client from core.clients.create_elevenlabs_client (base URL + auth preset)
+        self.client = client
         self.voice_id = config.elevenlabs_voice_id
-        self.base_url = "https://api.elevenlabs.io/v1"
         self.config = config
 
     async def generate_speech_stream(self, text: str, stream_sid: str) -> AsyncGenerator[bytes, None]:
         """
         Generate streaming TTS and yield mu-law audio chunks
         """
-        url = f"{self.base_url}/text-to-speech/{self.voice_id}/stream"
+        url = f"/text-to-speech/{self.voice_id}/stream"
+        output_format = self.config.tts_output_format
+        # ulaw_8000 is exactly Twilio's format; pcm_8000 only needs the mu-law table;
+        # mp3 needs a full decode/resample/encode pass
+        params = {"output_format": output_format} if output_format != "mp3" else None
         headers = {
-            "Accept": "audio/mpeg",
+            "Accept": _ACCEPT_BY_FORMAT[output_format],
             "Content-Type": "application/json",
-            "xi-api-key": self.api_key
         }
 
         payload = {
@@ -45,110 +81,144 @@ class ElevenLabsTTS:
         }
 
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                async with client.stream("POST", url, json=payload, headers=headers) as response:
-                    response.raise_for_status()
+            async with self.client.stream(
+                "POST", url, params=params, json=payload, headers=headers
+            ) as response:
+                response.raise_for_status()
 
-                    # Buffer full MP3 so we decode once (streaming chunks can be partial frames)
-                    buffer = bytearray()
+                if output_format == "ulaw_8000":
+                    # Pass mu-law through as it arrives; TwilioAudioStreamer does the framing
                     async for chunk in response.aiter_bytes():
                         if chunk:
-                            buffer.extend(chunk)
+                            yield chunk
+                    return
 
-                    if not buffer:
-                        return
+                if output_format == "pcm_8000":
+                    # Already 8 kHz: encode each piece as it arrives, no decode or resample.
+                    # Samples are 2 bytes, so carry an odd trailing byte to the next piece.
+                    carry = b""
+                    async for chunk in response.aiter_bytes():
+                        data = carry + chunk
+                        even = len(data) & ~1
+                        carry = data[even:]
+                        if even:
+                            pcm_data = np.frombuffer(data, dtype="<i2", count=even // 2)
+                            yield self._pcm_to_mulaw(pcm_data).tobytes()
+                    return
+
+                # Buffer full MP3 so we decode once (streaming chunks can be partial frames)
+                buffer = bytearray()
+                async for chunk in response.aiter_bytes():
+                    if chunk:
+                        buffer.extend(chunk)
+
+                if not buffer:
+                    return
 
-                    # Single decode of complete MP3, then yield mu-law in chunks
-                    mulaw_full = await self._convert_to_mulaw(bytes(buffer))
-                    if not mulaw_full:
-                        return
-                    chunk_size = self.config.tts_chunk_size
-                    for i in range(0, len(mulaw_full), chunk_size):
-                        yield mulaw_full[i : i + chunk_size]
+                # Single decode of complete MP3; TwilioAudioStreamer does the framing
+                mulaw_full = await self._convert_to_mulaw(bytes(buffer))
+                if mulaw_full:
+                    yield mulaw_full
 
         except Exception as e:
-            logger.error("ElevenLabs TTS failed",
-                        stream_sid=stream_sid,
-                        error=str(e))
+            # Reported once per reply by the caller; keep the per-chunk line at DEBUG
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("ElevenLabs TTS failed",
+                            stream_sid=stream_sid,
+                            error=str(e))
             raise TTSError(f"Failed to generate TTS: {e}") from e
 
     async def _convert_to_mulaw(self, audio_data: bytes) -> Optional[bytes]:
         """Convert audio data to mu-law format required by Twilio"""
         try:
-            # Load audio with pydub (handles various formats)
-            audio = AudioSegment.from_file(io.BytesIO(audio_data), format="mp3")
-
-            # Convert to 8kHz mono
-            audio = audio.set_frame_rate(8000).set_channels(1)
+            # ffmpeg decode + encode is CPU-bound: keep it off the event loop
+            return await asyncio.to_thread(self._convert_to_mulaw_sync, audio_data)
+        except Exception as e:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Audio conversion failed", error=str(e))
+            raise AudioProcessingError(f"Failed to convert audio to mu-law: {e}") from e
 
-            # Convert to raw PCM data
-            pcm_data = np.array(audio.get_array_of_samples())
+    def _convert_to_mulaw_sync(self, audio_data: bytes) -> bytes:
+        """Decode MP3, resample to 8 kHz mono and mu-law encode (blocking)."""
+        # Load audio with pydub (handles various formats)
+        audio = AudioSegment.from_file(io.BytesIO(audio_data), format="mp3")
 
-            # Apply mu-law compression
-            mulaw_data = self._pcm_to_mulaw(pcm_data)
+        # Convert to 8kHz mono 16-bit (the encode table is indexed by int16 samples)
+        audio = audio.set_frame_rate(8000).set_channels(1).set_sample_width(2)
 
-            return bytes(mulaw_data)
+        # View the raw 16-bit PCM without copying it into a Python array first
+        pcm_data = np.frombuffer(audio.raw_data, dtype=np.int16)
 
-        except Exception as e:
-            logger.error("Audio conversion failed", error=str(e))
-            raise AudioProcessingError(f"Failed to convert audio to mu-law: {e}") from e
+        # Apply mu-law compression
+        return self._pcm_to_mulaw(pcm_data).tobytes()
 
     def _pcm_to_mulaw(self, pcm_data: np.ndarray) -> np.ndarray:
         """Convert 16-bit PCM to 8-bit mu-law"""
-        # Normalize to [-1, 1]
-        pcm_float = pcm_data.astype(np.float32) / 32768.0
+        # Reinterpreting int16 as uint16 is free; the output is the only allocation
+        return self._MULAW_LUT.take(pcm_data.view(np.uint16))
 
-        # Mu-law compression
-        mu = 255.0
-        sign = np.sign(pcm_float)
-        magnitude = np.abs(pcm_float)
 
-        # Apply mu-law formula
-        compressed = np.log(1.0 + mu * magnitude) / np.log(1.0 + mu)
+# Yielded to TwilioAudioStreamer.stream_to_twilio at the end of each sentence:
+# send the buffered tail now instead of holding it for the next sentence's audio
+FLUSH_AUDIO = b""
 
-        # Scale to 8-bit range and add sign
-        mulaw = sign * compressed * 127.0 + 128.0
-
-        # Clip and convert to uint8
-        mulaw = np.clip(mulaw, 0, 255).astype(np.uint8)
-
-        return mulaw
 
 class TwilioAudioStreamer:
     """Handle streaming audio to Twilio WebSocket"""
 
     def __init__(self, config: Config):
         self.chunk_size = config.tts_chunk_size
+        # Coalesce several 20 ms frames per media message to amortize per-send overhead
+        self.message_bytes = config.tts_chunk_size * config.tts_frames_per_message
 
     async def stream_to_twilio(self, websocket, tts_generator: AsyncGenerator[bytes, None], stream_sid: str, mark_id: str):
-        """Stream TTS audio chunks to Twilio WebSocket"""
-        try:
-            async for audio_chunk in tts_generator:
-                # Split into smaller chunks for real-time streaming
-                for i in range(0, len(audio_chunk), self.chunk_size):
-                    chunk = audio_chunk[i:i + self.chunk_size]
-                    if chunk:
-                        # Base64 encode
-                        encoded_audio = base64.b64encode(chunk).decode('utf-8')
+        """Stream TTS audio chunks to Twilio WebSocket
 
-                        # Send media message
-                        media_message = {
-                            EVENT_KEY: "media",
-                            STREAM_SID_KEY: stream_sid,
-                            MEDIA_KEY: {PAYLOAD_KEY: encoded_audio},
-                        }
-                        await websocket.send_text(json.dumps(media_message))
+        Audio is sent in messages of tts_frames_per_message frames; a FLUSH_AUDIO
+        chunk (and the end of the stream) sends whatever is buffered right away.
+        """
+        # JSON-encode the streamSid once; each message is just prefix + payload + suffix
+        sid_json = orjson.dumps(stream_sid).decode()
+        prefix = MEDIA_MESSAGE_PREFIX_TEMPLATE % sid_json
+        # The closing mark is known up front; build it now so it goes out as soon as audio ends
+        mark_message = MARK_MESSAGE_TEMPLATE % (sid_json, orjson.dumps(mark_id).decode())
+        # Bytes not yet sent; only full messages go out until a flush
+        pending = bytearray()
+
+        async def send_media(payload) -> None:
+            # SIMD base64 straight to str (no bytes -> str decode step)
+            encoded_audio = pybase64.b64encode_as_string(payload)
+            await websocket.send_text(prefix + encoded_audio + MEDIA_MESSAGE_SUFFIX)
+
+        async def flush() -> None:
+            if pending:
+                # Send the rest in one message, padding the last partial frame
+                # with mu-law silence (0xFF)
+                pending.extend(b"\xff" * (-len(pending) % self.chunk_size))
+                await send_media(pending)
+                pending.clear()
 
-                        # Small delay to prevent overwhelming the WebSocket
-                        await asyncio.sleep(0.01)
+        try:
+            async for audio_chunk in tts_generator:
+                if not audio_chunk:  # FLUSH_AUDIO: end of a sentence
+                    await flush()
+                    continue
+                pending += audio_chunk
+                # Wait for tts_frames_per_message frames: small network chunks are
+                # coalesced instead of each going out as a one- or two-frame message
+                full = len(pending) - len(pending) % self.message_bytes
+                if not full:
+                    continue
+                # memoryview slices are zero-copy and pybase64 encodes them directly
+                with memoryview(pending) as pending_view:
+                    for i in range(0, full, self.message_bytes):
+                        await send_media(pending_view[i:i + self.message_bytes])
+                del pending[:full]
+
+            await flush()
 
             # Send mark message to indicate completion
-            mark_message = {
-                EVENT_KEY: "mark",
-                STREAM_SID_KEY: stream_sid,
-                MARK_KEY: {MARK_NAME_KEY: mark_id},
-            }
-            await websocket.send_text(json.dumps(mark_message))
+            await websocket.send_text(mark_message)
             logger.info("TTS streaming completed", stream_sid=stream_sid, mark_id=mark_id)
 
         except Exception as e: